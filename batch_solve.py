@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Sliding Puzzle Solver - Batch Solver
+Solves many puzzles from a file without the GUI, one JSON result line per puzzle.
+
+Input is JSON lines or plain rows. A JSON line is an object with "tiles" (flat,
+row-major) or "matrix" (list of rows), plus optional "rows", "cols", "id" and
+"goal" (same form as the start), or just the bare tiles/matrix array. A plain row
+holds the tiles separated by spaces or commas, with the size taken from --rows
+and --cols or a square board. 0 is the blank, blank lines and '#' comments are
+skipped, and "-" reads standard input.
+
+--generate N solves N seeded boards instead of reading a file, random walks in a
+--difficulty band or uniform shuffles. The board seed is the id, so any board is
+rebuilt from --seed and its id. Bands measure Manhattan distance, or with
+--band-metric optimal the optimal solution length (3x3, 3x4 and 4x3 boards).
+
+Example: python batch_solve.py boards.txt -a "IDA*" --heuristic "Linear Conflict" -j 4
+         python batch_solve.py --generate 100 --rows 4 --cols 4 --difficulty hard --seed 7
+         python batch_solve.py --generate 50 --rows 3 --cols 4 --band-metric optimal -a "IDA*"
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+from functools import partial
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from puzzle import Puzzle, DIFFICULTY_LEVELS, OPTIMAL_DIFFICULTY_BANDS
+from search_algorithms import (
+    SearchControl,
+    solve_puzzle_bfs,
+    solve_puzzle_bidirectional_bfs,
+    solve_puzzle_astar,
+    solve_puzzle_weighted_astar,
+    solve_puzzle_arastar,
+    solve_puzzle_gbfs,
+    solve_puzzle_idastar,
+    solve_puzzle_beam,
+    generate_puzzle_at_optimal_distance
+)
+
+def solve_puzzle_decomposition(puzzle, goal_puzzle, control=None):
+    """Decomposition, imported on first use since it loads the distance table module"""
+    from decomposition import solve_puzzle_decomposition
+    return solve_puzzle_decomposition(puzzle, goal_puzzle, control=control)
+
+ALGORITHMS = {
+    "BFS": solve_puzzle_bfs,
+    "Bidirectional BFS": solve_puzzle_bidirectional_bfs,
+    "A*": solve_puzzle_astar,
+    "Weighted A*": solve_puzzle_weighted_astar,
+    "ARA*": solve_puzzle_arastar,
+    "GBFS": solve_puzzle_gbfs,
+    "IDA*": solve_puzzle_idastar,
+    "Beam Search": solve_puzzle_beam,
+    "Decomposition": solve_puzzle_decomposition
+}
+
+# Informed searches take a heuristic name
+HEURISTIC_ALGORITHMS = ["A*", "Weighted A*", "ARA*", "GBFS", "IDA*", "Beam Search"]
+
+# Further solver keyword arguments, taken from the command line options of the same name
+ALGORITHM_OPTIONS = {
+    "Weighted A*": ["weight"],
+    "ARA*": ["weight"],
+    "Beam Search": ["beam_width"]
+}
+
+def board_shape(tiles, rows, cols):
+    """Board dimensions for a flat tile list, from the given sizes or a square board"""
+    if rows and cols:
+        return rows, cols
+    if rows or cols:
+        return (rows, len(tiles) // rows) if rows else (len(tiles) // cols, cols)
+    side = round(math.sqrt(len(tiles)))
+    if side * side != len(tiles):
+        raise ValueError(f"{len(tiles)} tiles is not a square board, pass --rows and --cols")
+    return side, side
+
+def parse_board(value, rows, cols):
+    """Flat tiles and dimensions from a flat list or a list of rows"""
+    if value and isinstance(value[0], list):
+        return [tile for row in value for tile in row], len(value), len(value[0])
+    rows, cols = board_shape(value, rows, cols)
+    return list(value), rows, cols
+
+def parse_line(line, line_number, rows, cols):
+    """One input line as (id, tiles, rows, cols, goal tiles or None), None for blank lines"""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    
+    if line[0] in "{[":
+        entry = json.loads(line)
+        if isinstance(entry, list):
+            entry = {"tiles": entry}
+        rows, cols = entry.get("rows", rows), entry.get("cols", cols)
+        tiles, rows, cols = parse_board(entry["matrix"] if "matrix" in entry else entry["tiles"], rows, cols)
+        goal_tiles = parse_board(entry["goal"], rows, cols)[0] if "goal" in entry else None
+        return entry.get("id", line_number), tiles, rows, cols, goal_tiles
+    
+    tiles = [int(value) for value in line.replace(",", " ").split()]
+    rows, cols = board_shape(tiles, rows, cols)
+    return line_number, tiles, rows, cols, None
+
+def task_puzzles(task):
+    """Start and goal Puzzles of a parsed task, the goal defaults to the ordered board"""
+    puzzle_id, tiles, rows, cols, goal_tiles = task[:5]
+    if len(tiles) != rows * cols or sorted(tiles) != list(range(rows * cols)):
+        raise ValueError(f"Not a {rows}x{cols} board: {tiles}")
+    if goal_tiles is None:
+        goal_tiles = [val for row in Puzzle(rows, cols, gen_random=False).matrix for val in row]
+    puzzle = Puzzle.from_matrix([tiles[row * cols:(row + 1) * cols] for row in range(rows)])
+    goal_puzzle = Puzzle.from_matrix([goal_tiles[row * cols:(row + 1) * cols] for row in range(rows)])
+    return puzzle, goal_puzzle
+
+def cache_name(task):
+    """Solution cache name of a task's solver, informed searches include the heuristic"""
+    algorithm_name, heuristic = task[5:7]
+    name = f"{algorithm_name} + {heuristic}" if algorithm_name in HEURISTIC_ALGORITHMS else algorithm_name
+    return name + "".join(f" ({key}={value})" for key, value in sorted(task[9].items()))
+
+def result_record(puzzle_id, result):
+    """Output record for a solver result"""
+    solved = result['status'] == 'solved'
+    record = {'id': puzzle_id,
+              'status': result['status'],
+              'length': len(result['solution_moves']) if solved else None,
+              'moves': result['solution_moves'],
+              'runtime_ms': round(result['runtime_ms'], 3),
+              'nodes_expanded': result['nodes_expanded'],
+              'max_puzzles_in_memory': result['max_puzzles_in_memory']}
+    if 'partial_h' in result:
+        record.update(partial_h=result['partial_h'], partial_moves=result['partial_moves'])
+    for name in ('bound', 'stopped', 'peak_memory_bytes', 'original_length', 'cached'):
+        if result.get(name) is not None:
+            record[name] = result[name]
+    return record
+
+def solve_task(task):
+    """Worker entry point, solves one parsed puzzle and returns its output record"""
+    puzzle_id, tiles, rows, cols, goal_tiles, algorithm_name, heuristic, time_limit_ms, node_limit, options = task
+    try:
+        puzzle, goal_puzzle = task_puzzles(task)
+        
+        # Different parity classes never meet, no need to search
+        if not Puzzle.is_solvable_between_2d(puzzle.matrix, goal_puzzle.matrix):
+            return {'id': puzzle_id, 'status': 'unsolvable', 'length': None, 'moves': []}
+        
+        algorithm = ALGORITHMS[algorithm_name]
+        kwargs = {'control': SearchControl(time_limit_ms=time_limit_ms, node_limit=node_limit)}
+        if algorithm_name in HEURISTIC_ALGORITHMS:
+            kwargs['heuristic'] = heuristic
+        kwargs.update(options)
+        # The 'shorten' option passes the solution through the path optimizer
+        if kwargs.pop('shorten', False):
+            from path_optimizer import solve_puzzle_shortened
+            algorithm = partial(solve_puzzle_shortened, solver=partial(algorithm, **kwargs))
+            kwargs = {'control': kwargs['control']}
+        return result_record(puzzle_id, algorithm(puzzle, goal_puzzle, **kwargs))
+    except Exception as e:
+        return {'id': puzzle_id, 'status': 'error', 'error': str(e)}
+
+def solve_entry(entry):
+    """Worker entry point for (task, cached record) pairs, only misses are solved"""
+    task, record = entry
+    return task, record if record is not None else solve_task(task)
+
+def check_cache(tasks, cache):
+    """Pair each task with its record from the cache, None when it still needs solving"""
+    for task in tasks:
+        try:
+            result = cache.get(cache_name(task), *task_puzzles(task))
+        except ValueError:
+            result = None
+        yield task, result_record(task[0], result) if result is not None else None
+
+def solver_options(args):
+    """Keyword arguments for the chosen solver's ALGORITHM_OPTIONS, plus 'shorten' with --shorten"""
+    options = {name: getattr(args, name) for name in ALGORITHM_OPTIONS.get(args.algorithm, [])}
+    if args.shorten:
+        options['shorten'] = True
+    return options
+
+def read_tasks(file, args):
+    """Parse the input lazily, so workers start before the whole file is read. Bad lines are
+    reported on stderr and skipped."""
+    for line_number, line in enumerate(file, 1):
+        try:
+            parsed = parse_line(line, line_number, args.rows, args.cols)
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            print(f"line {line_number}: {e}", file=sys.stderr)
+            continue
+        if parsed is not None:
+            yield parsed + (args.algorithm, args.heuristic, args.time_limit, args.node_limit, solver_options(args))
+
+def generated_shape(args):
+    """Board dimensions for --generate, from --rows/--cols or a square board, 3x3 by default"""
+    return args.rows or args.cols or 3, args.cols or args.rows or 3
+
+def generate_tasks(args):
+    """Seeded boards for --generate, uniform shuffles or random walks in the difficulty band,
+    by Manhattan distance or optimal length"""
+    rows, cols = generated_shape(args)
+    rng = random.Random(args.seed)
+    for _ in range(args.generate):
+        board_seed = rng.randrange(2 ** 32)
+        if args.difficulty == "uniform":
+            matrix = Puzzle.generate_random_puzzle(rows, cols, True, board_seed)
+        elif args.band_metric == "optimal":
+            min_moves, max_moves = OPTIMAL_DIFFICULTY_BANDS[(rows, cols)][args.difficulty]
+            matrix = generate_puzzle_at_optimal_distance(rows, cols, min_moves, max_moves, board_seed)
+        else:
+            min_distance, max_distance = Puzzle.difficulty_band(rows, cols, args.difficulty)
+            matrix = Puzzle.generate_random_walk_puzzle(rows, cols, min_distance, max_distance, board_seed)
+        yield (board_seed, [val for row in matrix for val in row], rows, cols, None,
+               args.algorithm, args.heuristic, args.time_limit, args.node_limit, solver_options(args))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve sliding puzzles from a file without the GUI")
+    optimal_sizes = ", ".join(f"{rows}x{cols}" for rows, cols in OPTIMAL_DIFFICULTY_BANDS)
+    parser.add_argument("input", nargs="?", help="puzzle file, JSON lines or plain rows, '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="result file, JSON lines (default stdout)")
+    parser.add_argument("-a", "--algorithm", default="A*", choices=list(ALGORITHMS))
+    parser.add_argument("--heuristic", default="Manhattan", help="heuristic for A*, GBFS and IDA*")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--rows", type=int, help="board rows for plain rows input")
+    parser.add_argument("--cols", type=int, help="board columns for plain rows input")
+    parser.add_argument("--weight", type=float, default=2.0, help="weight on h for Weighted A*, ARA* starts from it")
+    parser.add_argument("--beam-width", type=int, default=1000, help="states kept per layer by Beam Search")
+    parser.add_argument("--shorten", action="store_true", help="shorten solutions with the path optimizer")
+    parser.add_argument("--time-limit", type=int, help="per-puzzle time limit in ms")
+    parser.add_argument("--node-limit", type=int, help="per-puzzle node limit")
+    parser.add_argument("--generate", type=int, metavar="N", help="solve N generated boards instead of a file")
+    parser.add_argument("--difficulty", default="medium", choices=["uniform"] + list(DIFFICULTY_LEVELS),
+                        help="generated board difficulty (default medium)")
+    parser.add_argument("--band-metric", default="manhattan", choices=["manhattan", "optimal"],
+                        help="what the difficulty band measures, optimal solution length has bands for "
+                             f"{optimal_sizes} (default manhattan)")
+    parser.add_argument("--seed", type=int, help="seed for generated boards")
+    parser.add_argument("--cache", metavar="FILE", help="solution cache file, loaded first and saved at the end")
+    args = parser.parse_args(argv)
+    if (args.input is None) == (args.generate is None):
+        parser.error("pass either an input file or --generate")
+    if (args.band_metric == "optimal" and args.difficulty != "uniform"
+            and generated_shape(args) not in OPTIMAL_DIFFICULTY_BANDS):
+        parser.error(f"--band-metric optimal has bands for {optimal_sizes} boards only")
+    
+    input_file = None
+    if args.generate is not None:
+        tasks = generate_tasks(args)
+    else:
+        input_file = sys.stdin if args.input == "-" else open(args.input)
+        tasks = read_tasks(input_file, args)
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w")
+    # Lookups and stores stay in this process, workers only see the misses
+    from solution_cache import SolutionCache
+    cache = SolutionCache(path=args.cache)
+    entries = check_cache(tasks, cache)
+    pool = None
+    
+    try:
+        if args.workers <= 1:
+            records = map(solve_entry, entries)
+        else:
+            pool = multiprocessing.Pool(args.workers)
+            # Results stream as soon as any worker finishes, the id ties them back to the input
+            records = pool.imap_unordered(solve_entry, entries)
+        for task, record in records:
+            if record['status'] == 'solved' and not record.get('cached'):
+                cache.put(cache_name(task), *task_puzzles(task), dict(record, solution_moves=record['moves']))
+            output_file.write(json.dumps(record) + "\n")
+            output_file.flush()
+        if args.cache:
+            cache.save()
+    finally:
+        if pool is not None:
+            pool.terminate()
+        if input_file not in (None, sys.stdin):
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Sliding Puzzle Solver - Benchmark Script
+Times the search algorithms on a fixed set of 15-puzzle instances.
+Run with "heuristics" to compare heuristic providers instead.
+Run with "suite [results.json]" for the reproducible suite, which writes JSON,
+and "compare old.json new.json" to diff two suite runs. "suite --band-metric optimal"
+bands the 3x3 boards by optimal solution length instead of Manhattan distance.
+"""
+
+import json
+import multiprocessing
+import platform
+import random
+import subprocess
+import sys
+import os
+import time
+from functools import partial
+
+try:
+    import resource
+except ImportError:
+    # No peak RSS on Windows
+    resource = None
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from puzzle import Puzzle, OPTIMAL_DIFFICULTY_BANDS
+from search_algorithms import (
+    SearchControl,
+    solve_puzzle_bfs,
+    solve_puzzle_bidirectional_bfs,
+    solve_puzzle_astar,
+    solve_puzzle_gbfs,
+    solve_puzzle_idastar,
+    generate_puzzle_at_optimal_distance
+)
+from heuristics import HEURISTICS
+
+# Fixed 4x4 instances (row-major, 0 is blank), scrambled from the default goal
+BENCHMARK_INSTANCES_4X4 = [
+    [1, 2, 3, 4, 9, 7, 8, 0, 6, 5, 13, 11, 14, 10, 15, 12],
+    [6, 3, 15, 4, 2, 14, 10, 7, 5, 9, 0, 8, 1, 13, 12, 11],
+    [0, 5, 6, 3, 9, 1, 8, 4, 2, 10, 7, 11, 13, 14, 15, 12],
+    [10, 5, 0, 3, 2, 4, 7, 11, 1, 9, 8, 6, 13, 14, 15, 12],
+    [2, 4, 6, 8, 3, 14, 12, 11, 1, 15, 10, 13, 5, 0, 9, 7],
+    [2, 1, 3, 4, 7, 6, 11, 8, 13, 15, 0, 14, 10, 9, 5, 12]
+]
+
+ALGORITHMS = {
+    "A*": solve_puzzle_astar,
+    "GBFS": solve_puzzle_gbfs,
+    "IDA*": solve_puzzle_idastar
+}
+
+def run_benchmark(algorithms=ALGORITHMS, instances=BENCHMARK_INSTANCES_4X4, rows=4, cols=4):
+    """Solve every instance with every algorithm and print nodes/sec per run"""
+    goal_puzzle = Puzzle(rows, cols, gen_random=False)
+    
+    for algo_name, algorithm in algorithms.items():
+        total_nodes = 0
+        total_ms = 0.0
+        
+        for index, values in enumerate(instances):
+            matrix = [values[row * cols:(row + 1) * cols] for row in range(rows)]
+            solution = algorithm(Puzzle.from_matrix(matrix), goal_puzzle)
+            moves = solution['solution_moves']
+            runtime_ms = solution['runtime_ms']
+            nodes = solution['nodes_expanded']
+            total_nodes += nodes
+            total_ms += runtime_ms
+            print(f"{algo_name:<5} #{index}: {len(moves):4d} moves {nodes:8d} nodes "
+                  f"{runtime_ms:10.1f}ms {nodes / max(runtime_ms, 1e-3) * 1000:10.0f} nodes/s")
+        
+        print(f"{algo_name:<5} total: {total_nodes} nodes in {total_ms:.1f}ms "
+              f"({total_nodes / max(total_ms, 1e-3) * 1000:.0f} nodes/s)\n")
+
+def run_heuristic_benchmark(algorithms={"A*": solve_puzzle_astar, "IDA*": solve_puzzle_idastar},
+                            heuristics=HEURISTICS, instances=BENCHMARK_INSTANCES_4X4, rows=4, cols=4):
+    """Solve every instance with each heuristic and print nodes expanded and wall time"""
+    goal_puzzle = Puzzle(rows, cols, gen_random=False)
+    
+    for algo_name, algorithm in algorithms.items():
+        for heuristic in heuristics:
+            total_nodes = 0
+            total_ms = 0.0
+            
+            for values in instances:
+                matrix = [values[row * cols:(row + 1) * cols] for row in range(rows)]
+                solution = algorithm(Puzzle.from_matrix(matrix), goal_puzzle, heuristic)
+                total_nodes += solution['nodes_expanded']
+                total_ms += solution['runtime_ms']
+            
+            print(f"{algo_name:<5} {heuristic:<17} {total_nodes:10d} nodes {total_ms:10.1f}ms")
+        print()
+
+# Suite boards come from this seed, bump SUITE_VERSION whenever instances or engines change
+SUITE_SEED = 20240917
+SUITE_VERSION = 2
+INSTANCES_PER_BAND = 5
+
+# Difficulty bands per board size, inclusive Manhattan distance ranges of seeded random walks
+DIFFICULTY_BANDS = {
+    (3, 3): {"easy": (6, 10), "medium": (11, 15), "hard": (16, 20)},
+    (4, 4): {"easy": (16, 22), "medium": (23, 28), "hard": (29, 32)}
+}
+
+# Sizes run by "suite --band-metric optimal", banded by puzzle.OPTIMAL_DIFFICULTY_BANDS
+OPTIMAL_SUITE_SIZES = [(3, 3)]
+
+# Engines per board size, each run stops at the size's SUITE_NODE_LIMITS entry
+SUITE_ENGINES = {
+    (3, 3): {
+        "BFS": solve_puzzle_bfs,
+        "Bidirectional BFS": solve_puzzle_bidirectional_bfs,
+        "A* + Manhattan": partial(solve_puzzle_astar, heuristic="Manhattan"),
+        "GBFS + Manhattan": partial(solve_puzzle_gbfs, heuristic="Manhattan"),
+        "IDA* + Manhattan": partial(solve_puzzle_idastar, heuristic="Manhattan")
+    },
+    (4, 4): {
+        "A* + Manhattan": partial(solve_puzzle_astar, heuristic="Manhattan"),
+        "GBFS + Manhattan": partial(solve_puzzle_gbfs, heuristic="Manhattan"),
+        "IDA* + Manhattan": partial(solve_puzzle_idastar, heuristic="Manhattan"),
+        "IDA* + Walking Distance": partial(solve_puzzle_idastar, heuristic="Walking Distance")
+    }
+}
+# Manhattan bands are a rough guide on 4x4, the limit keeps outliers from dominating the suite
+SUITE_NODE_LIMITS = {(3, 3): None, (4, 4): 100000}
+
+def suite_instances(rows, cols, bands, count=INSTANCES_PER_BAND, seed=SUITE_SEED, band_metric="manhattan"):
+    """Seeded boards for every band, [(band, board seed, flat tiles)] in a fixed order.
+    
+    Board seeds are drawn from one generator per size, so every instance is rebuilt by
+    Puzzle.generate_random_walk_puzzle(rows, cols, low, high, board_seed), or with
+    band_metric "optimal" by generate_puzzle_at_optimal_distance with the same arguments.
+    """
+    rng = random.Random(f"{seed}-{rows}x{cols}")
+    instances = []
+    for band, (low, high) in bands.items():
+        for _ in range(count):
+            board_seed = rng.randrange(2 ** 32)
+            if band_metric == "optimal":
+                matrix = generate_puzzle_at_optimal_distance(rows, cols, low, high, board_seed)
+            else:
+                matrix = Puzzle.generate_random_walk_puzzle(rows, cols, low, high, board_seed)
+            instances.append((band, board_seed, [val for row in matrix for val in row]))
+    return instances
+
+def peak_rss_bytes():
+    """Peak resident set size of this process, None where unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def run_suite_case(engine, rows, cols, tiles, node_limit):
+    """Solve one board in a fresh worker process, so the peak RSS belongs to this run alone"""
+    puzzle = Puzzle.from_matrix([tiles[row * cols:(row + 1) * cols] for row in range(rows)])
+    start = time.perf_counter()
+    result = engine(puzzle, Puzzle(rows, cols, gen_random=False), control=SearchControl(node_limit=node_limit))
+    wall_ms = (time.perf_counter() - start) * 1000
+    return {
+        'status': result['status'],
+        'path_length': len(result['solution_moves']) if result['status'] == 'solved' else None,
+        'nodes_expanded': result['nodes_expanded'],
+        'max_puzzles_in_memory': result['max_puzzles_in_memory'],
+        'wall_ms': round(wall_ms, 3),
+        'peak_rss_bytes': peak_rss_bytes()
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_suite(output_path=None, bands=None, engines=SUITE_ENGINES, node_limits=SUITE_NODE_LIMITS,
+              band_metric="manhattan"):
+    """Run every engine on every suite instance, print a line per run and return the JSON report.
+    
+    bands defaults to DIFFICULTY_BANDS, or OPTIMAL_DIFFICULTY_BANDS for OPTIMAL_SUITE_SIZES
+    with band_metric "optimal".
+    """
+    if bands is None and band_metric == "optimal":
+        bands = {size: OPTIMAL_DIFFICULTY_BANDS[size] for size in OPTIMAL_SUITE_SIZES}
+    elif bands is None:
+        bands = DIFFICULTY_BANDS
+    report = {
+        'suite_version': SUITE_VERSION,
+        'seed': SUITE_SEED,
+        'band_metric': band_metric,
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'started': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'runs': []
+    }
+    # One process per run: peak RSS is per process and never goes down
+    with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+        for (rows, cols), size_bands in bands.items():
+            for band, board_seed, tiles in suite_instances(rows, cols, size_bands, band_metric=band_metric):
+                for engine_name, engine in engines[(rows, cols)].items():
+                    run = pool.apply(run_suite_case, (engine, rows, cols, tiles, node_limits.get((rows, cols))))
+                    run.update(size=f"{rows}x{cols}", band=band, seed=board_seed, engine=engine_name,
+                               tiles=tiles)
+                    report['runs'].append(run)
+                    print(f"{run['size']} {band:<6} {board_seed:>10} {engine_name:<24} {run['status']:<10} "
+                          f"{run['path_length'] or '-':>4} moves {run['nodes_expanded']:9d} nodes "
+                          f"{run['wall_ms']:10.1f}ms {(run['peak_rss_bytes'] or 0) / (1024 * 1024):7.1f}MB")
+    
+    if output_path:
+        with open(output_path, "w") as file:
+            json.dump(report, file, indent=1)
+        print(f"Results written to {output_path}")
+    return report
+
+def summarize_suite(report):
+    """Totals per (size, band, engine): runs, solved, nodes, wall ms, path length, worst peak RSS"""
+    totals = {}
+    for run in report['runs']:
+        total = totals.setdefault((run['size'], run['band'], run['engine']),
+                                  {'runs': 0, 'solved': 0, 'nodes': 0, 'wall_ms': 0.0, 'moves': 0, 'rss': 0})
+        total['runs'] += 1
+        total['solved'] += run['status'] == 'solved'
+        total['nodes'] += run['nodes_expanded']
+        total['wall_ms'] += run['wall_ms']
+        total['moves'] += run['path_length'] or 0
+        total['rss'] = max(total['rss'], run['peak_rss_bytes'] or 0)
+    return totals
+
+def compare_suites(old_report, new_report):
+    """Print per (size, band, engine) changes between two suite reports"""
+    if old_report['suite_version'] != new_report['suite_version']:
+        print("Warning: suite versions differ, instances may not match")
+    # Reports from before band metrics were recorded used Manhattan bands
+    if old_report.get('band_metric', "manhattan") != new_report.get('band_metric', "manhattan"):
+        print("Warning: band metrics differ, instances do not match")
+    old_totals = summarize_suite(old_report)
+    for key, new in summarize_suite(new_report).items():
+        old = old_totals.get(key)
+        if old is None:
+            print(f"{' '.join(key):<40} new")
+            continue
+        print(f"{' '.join(key):<40} time x{new['wall_ms'] / max(old['wall_ms'], 1e-3):5.2f}  "
+              f"nodes {new['nodes'] - old['nodes']:+10d}  moves {new['moves'] - old['moves']:+5d}  "
+              f"solved {old['solved']}->{new['solved']}/{new['runs']}  "
+              f"peak RSS {(new['rss'] - old['rss']) / (1024 * 1024):+7.1f}MB")
+
+if __name__ == "__main__":
+    if "heuristics" in sys.argv[1:]:
+        run_heuristic_benchmark()
+    elif sys.argv[1:2] == ["suite"]:
+        args = sys.argv[2:]
+        band_metric = "manhattan"
+        if "--band-metric" in args:
+            index = args.index("--band-metric")
+            band_metric = args[index + 1]
+            del args[index:index + 2]
+        run_suite(args[0] if args else None, band_metric=band_metric)
+    elif sys.argv[1:2] == ["compare"]:
+        with open(sys.argv[2]) as old_file, open(sys.argv[3]) as new_file:
+            compare_suites(json.load(old_file), json.load(new_file))
+    else:
+        run_benchmark()
@@ -0,0 +1,180 @@
+import time
+from collections import deque
+from puzzle import Puzzle, PackedBoard
+from search_algorithms import SearchControl, DIRECTION_NAMES, search_result
+from distance_table import solve_puzzle_lookup
+
+# Boards are peeled down to a core this size or smaller, which is then solved optimally
+CORE_ROWS = 3
+CORE_COLS = 3
+
+class LinePeeler:
+    """Working board of the decomposition solver, fixes tiles one line at a time.
+    
+    Locked cells hold finished tiles and are never entered by the blank again.
+    Every slide is recorded in moves, as the blank's direction.
+    """
+    
+    def __init__(self, puzzle, goal_puzzle):
+        self.rows, self.cols = puzzle.rows, puzzle.cols
+        self.tiles = [val for row in puzzle.matrix for val in row]
+        self.goal_tiles = [val for row in goal_puzzle.matrix for val in row]
+        self.blank = self.tiles.index(0)
+        self.locked = bytearray(self.rows * self.cols)
+        self.slides = PackedBoard(self.rows, self.cols).slides
+        self.moves = []
+        self.nodes_expanded = 0
+    
+    def slide(self, target):
+        """Move the blank into a neighbouring cell"""
+        direction = next(direction for direction, cell in self.slides[self.blank] if cell == target)
+        self.tiles[self.blank], self.tiles[target] = self.tiles[target], 0
+        self.blank = target
+        self.moves.append(DIRECTION_NAMES[direction])
+    
+    def walk_blank(self, target, avoid):
+        """BFS the blank to target through unlocked cells, never entering avoid"""
+        parents = {self.blank: None}
+        queue = deque([self.blank])
+        while target not in parents:
+            cell = queue.popleft()
+            self.nodes_expanded += 1
+            for _, neighbor in self.slides[cell]:
+                if neighbor not in parents and not self.locked[neighbor] and neighbor != avoid:
+                    parents[neighbor] = cell
+                    queue.append(neighbor)
+        
+        path = []
+        while target != self.blank:
+            path.append(target)
+            target = parents[target]
+        for cell in reversed(path):
+            self.slide(cell)
+    
+    def move_tile(self, tile, target):
+        """Bring one tile to target through unlocked cells, BFS over (tile cell, blank cell)"""
+        start = (self.tiles.index(tile), self.blank)
+        parents = {start: None}
+        queue = deque([start])
+        state = start
+        while state[0] != target:
+            state = queue.popleft()
+            self.nodes_expanded += 1
+            tile_cell, blank = state
+            for _, neighbor in self.slides[blank]:
+                if self.locked[neighbor]:
+                    continue
+                # Sliding into the tile's cell swaps it with the blank
+                child = (blank if neighbor == tile_cell else tile_cell, neighbor)
+                if child not in parents:
+                    parents[child] = state
+                    queue.append(child)
+        
+        path = []
+        while state != start:
+            path.append(state[1])
+            state = parents[state]
+        for cell in reversed(path):
+            self.slide(cell)
+    
+    def place_line(self, cells, inner):
+        """Fix the goal tiles of one edge line, cells run from one corner to the other.
+        
+        inner is the cell offset pointing into the rest of the board. The last two
+        tiles go in together: the last cell's tile is parked in the corner and the
+        corner tile next to it on the inside, then both rotate into place.
+        """
+        for cell in cells[:-2]:
+            self.move_tile(self.goal_tiles[cell], cell)
+            self.locked[cell] = 1
+        
+        last, corner = cells[-2], cells[-1]
+        last_tile, corner_tile = self.goal_tiles[last], self.goal_tiles[corner]
+        if self.tiles[last] != last_tile or self.tiles[corner] != corner_tile:
+            self.move_tile(last_tile, corner)
+            self.locked[corner] = 1
+            
+            # With the corner locked the last cell is a dead end, a corner tile caught in
+            # it (or just inside it, with the blank in it) is held two cells inward instead
+            if self.tiles[last] == corner_tile or (self.tiles[last + inner] == corner_tile and self.blank == last):
+                self.locked[corner] = 0
+                self.move_tile(corner_tile, last + 2 * inner)
+                self.locked[last + 2 * inner] = 1
+                self.move_tile(last_tile, corner)
+                self.locked[last + 2 * inner] = 0
+                self.locked[corner] = 1
+            self.move_tile(corner_tile, corner + inner)
+            self.walk_blank(last, corner + inner)
+            self.slide(corner)
+            self.slide(corner + inner)
+        self.locked[last] = self.locked[corner] = 1
+    
+    def replay(self, moves):
+        """Apply move names, e.g. a core solution"""
+        offsets = {"UP": -self.cols, "DOWN": self.cols, "LEFT": -1, "RIGHT": 1}
+        for move in moves:
+            self.slide(self.blank + offsets[move])
+    
+    def core(self, top, bottom, left, right):
+        """Start and goal Puzzles of the remaining rectangle, tiles relabelled in goal order"""
+        cells = [row * self.cols + col for row in range(top, bottom + 1) for col in range(left, right + 1)]
+        labels = {0: 0}
+        for cell in cells:
+            if self.goal_tiles[cell]:
+                labels[self.goal_tiles[cell]] = len(labels)
+        width = right - left + 1
+        start = [labels[self.tiles[cell]] for cell in cells]
+        goal = [labels[self.goal_tiles[cell]] for cell in cells]
+        return (Puzzle.from_matrix([start[index:index + width] for index in range(0, len(cells), width)]),
+                Puzzle.from_matrix([goal[index:index + width] for index in range(0, len(cells), width)]))
+    
+    def puzzle(self):
+        return Puzzle.from_matrix([self.tiles[row * self.cols:(row + 1) * self.cols] for row in range(self.rows)])
+
+def solve_puzzle_decomposition(puzzle, goal_puzzle, control=None, core_solver=solve_puzzle_lookup):
+    """Decomposition - fixes the board's edge rows and columns one at a time, non-optimal.
+    
+    Each line is placed with small BFS runs over (tile, blank) cells, shrinking the
+    board until a CORE_ROWS x CORE_COLS core is left, which core_solver finishes
+    optimally. Lines are taken from the side away from the goal's blank, so any
+    goal layout works. Runs in milliseconds up to 8x8.
+    """
+    start_time = time.time()
+    control = control or SearchControl()
+    control.start()
+    
+    if not Puzzle.is_solvable_between_2d(puzzle.matrix, goal_puzzle.matrix):
+        return search_result(start_time, None, [], 0, 0)
+    
+    peeler = LinePeeler(puzzle, goal_puzzle)
+    cols = puzzle.cols
+    goal_blank_row, goal_blank_col = divmod(peeler.goal_tiles.index(0), cols)
+    top, bottom, left, right = 0, puzzle.rows - 1, 0, cols - 1
+    
+    while bottom - top + 1 > CORE_ROWS or right - left + 1 > CORE_COLS:
+        height, width = bottom - top + 1, right - left + 1
+        if height > CORE_ROWS and (height >= width or width <= CORE_COLS):
+            row = top if goal_blank_row != top else bottom
+            peeler.place_line([row * cols + col for col in range(left, right + 1)], cols if row == top else -cols)
+            top, bottom = (top + 1, bottom) if row == top else (top, bottom - 1)
+        else:
+            col = left if goal_blank_col != left else right
+            peeler.place_line([row * cols + col for row in range(top, bottom + 1)], 1 if col == left else -1)
+            left, right = (left + 1, right) if col == left else (left, right - 1)
+        
+        stop_reason = control.stop_reason(peeler.nodes_expanded)
+        if stop_reason:
+            return search_result(start_time, None, [], len(peeler.tiles), peeler.nodes_expanded, stop_reason,
+                                 peeler.puzzle(), peeler.moves, None)
+    
+    core_puzzle, core_goal = peeler.core(top, bottom, left, right)
+    result = core_solver(core_puzzle, core_goal, control=control)
+    nodes_expanded = peeler.nodes_expanded + result['nodes_expanded']
+    max_puzzles_in_memory = max(len(peeler.tiles), result['max_puzzles_in_memory'])
+    if result['status'] != 'solved':
+        peeler.replay(result['partial_moves'])
+        return search_result(start_time, None, [], max_puzzles_in_memory, nodes_expanded, result['status'],
+                             peeler.puzzle(), peeler.moves, result['partial_h'])
+    
+    peeler.replay(result['solution_moves'])
+    return search_result(start_time, peeler.puzzle(), peeler.moves, max_puzzles_in_memory, nodes_expanded)
@@ -0,0 +1,137 @@
+import hashlib
+import math
+import mmap
+import os
+import time
+from puzzle import Puzzle, PackedBoard, MAX_RANKED_CELLS
+from search_algorithms import DIRECTION_NAMES, search_result
+
+DISTANCE_TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "distance_tables")
+
+# Header: magic, rows, cols, then the goal's tiles one byte each
+FILE_MAGIC = b"SPDT"
+
+# Distances are stored mod DISTANCE_MODULUS in 4-bit nibbles, the spare value marks unreachable ranks.
+# Neighbouring states are exactly one move apart, so mod 15 still tells the closer neighbour apart.
+DISTANCE_MODULUS = 15
+UNREACHABLE = 0xF
+
+# Tables already mapped in this process, keyed by file path
+_loaded_tables = {}
+
+# Solves build missing tables up to this size (seconds on 3x3), larger ones take hours and
+# several GB, so they are only built ahead of time with "python distance_table.py R C"
+MAX_BUILT_ON_SOLVE_CELLS = 9
+
+def get_nibble(table, rank):
+    return (table[rank >> 1] >> ((rank & 1) << 2)) & 0xF
+
+def build_distance_table(rows, cols, goal_tiles):
+    """Retrograde BFS from the goal over every permutation rank, returns nibble-packed distances"""
+    board = PackedBoard(rows, cols)
+    table = bytearray([0xFF]) * ((math.factorial(board.size) + 1) // 2)
+    
+    goal_state = board.pack([goal_tiles[row * cols:(row + 1) * cols] for row in range(rows)])
+    goal_rank = board.rank(goal_state)
+    table[goal_rank >> 1] &= ~(0xF << ((goal_rank & 1) << 2)) & 0xFF
+    layer = [goal_state]
+    distance = 0
+    
+    while layer:
+        distance += 1
+        value = distance % DISTANCE_MODULUS
+        next_layer = []
+        for state in layer:
+            for _, target in board.slides[board.blank_index(state)]:
+                neighbor_state = board.slide(state, target)
+                rank = board.rank(neighbor_state)
+                shift = (rank & 1) << 2
+                if (table[rank >> 1] >> shift) & 0xF == UNREACHABLE:
+                    table[rank >> 1] = (table[rank >> 1] & ~(0xF << shift) & 0xFF) | (value << shift)
+                    next_layer.append(neighbor_state)
+        layer = next_layer
+    
+    return table
+
+def distance_table_path(rows, cols, goal_tiles, directory=DISTANCE_TABLE_DIR):
+    """Table file name, keyed by board size and goal layout"""
+    digest = hashlib.sha1(bytes(goal_tiles)).hexdigest()[:16]
+    return os.path.join(directory, f"dist_{rows}x{cols}_{digest}.bin")
+
+def missing_table_error(rows, cols, goal_tiles, directory=DISTANCE_TABLE_DIR):
+    """Why a solve can't use the table yet: the board is too large or its table is unbuilt, else None"""
+    if rows * cols > MAX_RANKED_CELLS:
+        return f"Distance tables support boards up to {MAX_RANKED_CELLS} tiles"
+    if rows * cols > MAX_BUILT_ON_SOLVE_CELLS and not os.path.exists(
+            distance_table_path(rows, cols, goal_tiles, directory)):
+        return (f"No distance table for this {rows}x{cols} goal yet, building one takes hours and several GB.\n"
+                f"Build the default goal's table ahead of time with: python distance_table.py {rows} {cols}")
+    return None
+
+def get_distance_table(rows, cols, goal_tiles, directory=DISTANCE_TABLE_DIR):
+    """Memory-map the goal's distance table, building and saving it first if missing"""
+    if rows * cols > MAX_RANKED_CELLS:
+        raise ValueError(f"Distance tables support boards up to {MAX_RANKED_CELLS} tiles")
+    
+    path = distance_table_path(rows, cols, goal_tiles, directory)
+    if path in _loaded_tables:
+        return _loaded_tables[path]
+    
+    header = FILE_MAGIC + bytes([rows, cols]) + bytes(goal_tiles)
+    if not os.path.exists(path):
+        table = build_distance_table(rows, cols, goal_tiles)
+        os.makedirs(directory, exist_ok=True)
+        with open(path + ".tmp", "wb") as file:
+            file.write(header)
+            file.write(table)
+        os.replace(path + ".tmp", path)
+    
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if data[:len(header)] != header or len(data) - len(header) != (math.factorial(rows * cols) + 1) // 2:
+        data.close()
+        raise ValueError(f"Distance table {path} does not match this board")
+    
+    _loaded_tables[path] = memoryview(data)[len(header):]
+    return _loaded_tables[path]
+
+def solve_puzzle_lookup(puzzle, goal_puzzle, control=None):
+    """Table lookup - walks down a precomputed optimal distance table, no search.
+    
+    control is accepted for the common solver signature, a walk never needs stopping.
+    Raises ValueError rather than building a table past MAX_BUILT_ON_SOLVE_CELLS.
+    """
+    start_time = time.time()
+    
+    board = PackedBoard(puzzle.rows, puzzle.cols)
+    goal_tiles = [val for row in goal_puzzle.matrix for val in row]
+    error = missing_table_error(puzzle.rows, puzzle.cols, goal_tiles)
+    if error:
+        raise ValueError(error)
+    table = get_distance_table(puzzle.rows, puzzle.cols, goal_tiles)
+    
+    state = board.pack(puzzle.matrix)
+    goal_state = board.pack(goal_puzzle.matrix)
+    value = get_nibble(table, board.rank(state))
+    moves = []
+    
+    while value != UNREACHABLE and state != goal_state:
+        closer_value = (value - 1) % DISTANCE_MODULUS
+        for direction, target in board.slides[board.blank_index(state)]:
+            neighbor_state = board.slide(state, target)
+            if get_nibble(table, board.rank(neighbor_state)) == closer_value:
+                moves.append(DIRECTION_NAMES[direction])
+                state, value = neighbor_state, closer_value
+                break
+    
+    solved = value != UNREACHABLE
+    return search_result(start_time, Puzzle.from_matrix(goal_puzzle.matrix) if solved else None,
+                         moves, len(moves) + 1, len(moves))
+
+if __name__ == "__main__":
+    import sys
+    
+    # Precompute the default goal's table, e.g. "python distance_table.py 3 3"
+    rows, cols = (int(arg) for arg in sys.argv[1:3])
+    get_distance_table(rows, cols, [val for row in Puzzle(rows, cols, gen_random=False).matrix for val in row])
+    print(f"Distance table for {rows}x{cols} ready in {DISTANCE_TABLE_DIR}")
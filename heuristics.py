@@ -0,0 +1,215 @@
+from collections import deque
+from puzzle import Puzzle
+
+class SearchStopped(Exception):
+    """Raised when a SearchControl stops a heuristic's table build, reason is the stop reason"""
+    
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+class Heuristic:
+    """Base heuristic provider, estimates remaining moves for a flat row-major tile list.
+    
+    Solvers call evaluate() once on the start state and then update() after every
+    slide, where tile moved from from_cell into the blank at to_cell and tiles is
+    the board after the slide. Providers with needs_tiles = False ignore tiles, so
+    solvers may pass None and skip decoding the board. control, the solve's
+    SearchControl, is only used by providers that build tables on first use.
+    Providers whose h can drop by more than 1 in one slide set consistent = False,
+    so A* reopens states it reaches again on a cheaper path.
+    """
+    
+    needs_tiles = True
+    consistent = True
+    
+    def __init__(self, goal_puzzle, control=None):
+        self.rows = goal_puzzle.rows
+        self.cols = goal_puzzle.cols
+        self.goal_mapping = Puzzle.get_matrix_mapping(goal_puzzle.matrix)
+        self.manhattan_table = Puzzle.get_manhattan_table(self.goal_mapping, self.rows, self.cols)
+    
+    def evaluate(self, tiles):
+        raise NotImplementedError
+    
+    def update(self, h, tiles, tile, from_cell, to_cell):
+        raise NotImplementedError
+
+class ManhattanHeuristic(Heuristic):
+    """Sum of each tile's row and column distance from its goal cell"""
+    
+    needs_tiles = False
+    
+    def evaluate(self, tiles):
+        return sum(self.manhattan_table[tile][index] for index, tile in enumerate(tiles))
+    
+    def update(self, h, tiles, tile, from_cell, to_cell):
+        tile_distances = self.manhattan_table[tile]
+        return h - tile_distances[from_cell] + tile_distances[to_cell]
+
+def longest_increasing_run(values):
+    """Length of the longest strictly increasing subsequence"""
+    best = []
+    for index, value in enumerate(values):
+        best.append(1 + max((best[prev] for prev in range(index) if values[prev] < value), default=0))
+    return max(best, default=0)
+
+class LinearConflictHeuristic(ManhattanHeuristic):
+    """Manhattan plus 2 moves for every tile that must leave its goal line to let others pass"""
+    
+    needs_tiles = True
+    
+    def __init__(self, goal_puzzle, control=None):
+        super().__init__(goal_puzzle)
+        self.row_cells = [[row * self.cols + col for col in range(self.cols)] for row in range(self.rows)]
+        self.col_cells = [[row * self.cols + col for row in range(self.rows)] for col in range(self.cols)]
+        self.goal_row = {tile: goal['row'] for tile, goal in self.goal_mapping.items()}
+        self.goal_col = {tile: goal['col'] for tile, goal in self.goal_mapping.items()}
+    
+    def row_conflicts(self, tiles, row):
+        goal_cols = [self.goal_col[tiles[cell]] for cell in self.row_cells[row]
+                     if tiles[cell] and self.goal_row[tiles[cell]] == row]
+        return 2 * (len(goal_cols) - longest_increasing_run(goal_cols))
+    
+    def col_conflicts(self, tiles, col):
+        goal_rows = [self.goal_row[tiles[cell]] for cell in self.col_cells[col]
+                     if tiles[cell] and self.goal_col[tiles[cell]] == col]
+        return 2 * (len(goal_rows) - longest_increasing_run(goal_rows))
+    
+    def evaluate(self, tiles):
+        return (super().evaluate(tiles)
+                + sum(self.row_conflicts(tiles, row) for row in range(self.rows))
+                + sum(self.col_conflicts(tiles, col) for col in range(self.cols)))
+    
+    def line_conflicts(self, tiles, from_cell, to_cell):
+        """Conflicts on the two lines a slide between from_cell and to_cell can change"""
+        from_row, from_col = divmod(from_cell, self.cols)
+        to_row, to_col = divmod(to_cell, self.cols)
+        # A horizontal slide keeps the tile's order within its row, only its column changes
+        if from_row == to_row:
+            return self.col_conflicts(tiles, from_col) + self.col_conflicts(tiles, to_col)
+        return self.row_conflicts(tiles, from_row) + self.row_conflicts(tiles, to_row)
+    
+    def update(self, h, tiles, tile, from_cell, to_cell):
+        new_conflicts = self.line_conflicts(tiles, from_cell, to_cell)
+        # Undo the slide in place to measure the conflicts it removed
+        tiles[from_cell], tiles[to_cell] = tile, 0
+        old_conflicts = self.line_conflicts(tiles, from_cell, to_cell)
+        tiles[from_cell], tiles[to_cell] = 0, tile
+        return super().update(h, tiles, tile, from_cell, to_cell) - old_conflicts + new_conflicts
+
+# Walking distance tables shared between solves, keyed by (lines, line length, blank goal line)
+_walking_distance_tables = {}
+
+def build_walking_distance_table(lines, line_length, blank_goal_line):
+    """BFS over per-line goal-line counts, returns {(counts..., blank line): moves}.
+    
+    counts[line * lines + goal_line] is how many tiles in line belong in goal_line.
+    Only moves along one axis are counted, so the table is shared by every goal
+    layout with the same dimensions and blank goal line.
+    """
+    key = (lines, line_length, blank_goal_line)
+    if key in _walking_distance_tables:
+        return _walking_distance_tables[key]
+    
+    counts = [0] * (lines * lines)
+    for line in range(lines):
+        counts[line * lines + line] = line_length - (line == blank_goal_line)
+    start = tuple(counts) + (blank_goal_line,)
+    
+    table = {start: 0}
+    queue = deque([start])
+    while queue:
+        state = queue.popleft()
+        blank_line = state[-1]
+        for next_line in (blank_line - 1, blank_line + 1):
+            if not 0 <= next_line < lines:
+                continue
+            # Any tile from the neighbouring line can walk into the blank's line
+            for goal_line in range(lines):
+                if state[next_line * lines + goal_line] == 0:
+                    continue
+                next_state = list(state)
+                next_state[next_line * lines + goal_line] -= 1
+                next_state[blank_line * lines + goal_line] += 1
+                next_state[-1] = next_line
+                next_state = tuple(next_state)
+                if next_state not in table:
+                    table[next_state] = table[state] + 1
+                    queue.append(next_state)
+    
+    _walking_distance_tables[key] = table
+    return table
+
+class WalkingDistanceHeuristic(Heuristic):
+    """Vertical plus horizontal walking distance, ignores which tiles share a line but not their goal lines"""
+    
+    MAX_TILES = 16
+    
+    def __init__(self, goal_puzzle, control=None):
+        super().__init__(goal_puzzle)
+        if self.rows * self.cols > self.MAX_TILES:
+            raise ValueError(f"Walking distance supports boards up to {self.MAX_TILES} tiles")
+        blank_goal = self.goal_mapping[0]
+        self.row_table = build_walking_distance_table(self.rows, self.cols, blank_goal['row'])
+        self.col_table = build_walking_distance_table(self.cols, self.rows, blank_goal['col'])
+        self.goal_row = {tile: goal['row'] for tile, goal in self.goal_mapping.items()}
+        self.goal_col = {tile: goal['col'] for tile, goal in self.goal_mapping.items()}
+    
+    def row_counts(self, tiles):
+        counts = [0] * (self.rows * self.rows + 1)
+        for index, tile in enumerate(tiles):
+            if tile:
+                counts[index // self.cols * self.rows + self.goal_row[tile]] += 1
+            else:
+                counts[-1] = index // self.cols
+        return counts
+    
+    def col_counts(self, tiles):
+        counts = [0] * (self.cols * self.cols + 1)
+        for index, tile in enumerate(tiles):
+            if tile:
+                counts[index % self.cols * self.cols + self.goal_col[tile]] += 1
+            else:
+                counts[-1] = index % self.cols
+        return counts
+    
+    def evaluate(self, tiles):
+        return self.row_table[tuple(self.row_counts(tiles))] + self.col_table[tuple(self.col_counts(tiles))]
+    
+    def update(self, h, tiles, tile, from_cell, to_cell):
+        from_row, from_col = divmod(from_cell, self.cols)
+        to_row, to_col = divmod(to_cell, self.cols)
+        
+        # A slide only changes the walking distance along its own axis
+        if from_row != to_row:
+            lines, table, counts = self.rows, self.row_table, self.row_counts(tiles)
+            from_line, to_line, goal_line = from_row, to_row, self.goal_row[tile]
+        else:
+            lines, table, counts = self.cols, self.col_table, self.col_counts(tiles)
+            from_line, to_line, goal_line = from_col, to_col, self.goal_col[tile]
+        
+        new_distance = table[tuple(counts)]
+        counts[to_line * lines + goal_line] -= 1
+        counts[from_line * lines + goal_line] += 1
+        counts[-1] = to_line
+        return h - table[tuple(counts)] + new_distance
+
+def pattern_database_heuristic(goal_puzzle, control=None):
+    """Additive pattern databases, imported on first use since tables may need building"""
+    from pattern_database import PatternDatabaseHeuristic
+    return PatternDatabaseHeuristic(goal_puzzle, control=control)
+
+HEURISTICS = {
+    "Manhattan": ManhattanHeuristic,
+    "Linear Conflict": LinearConflictHeuristic,
+    "Walking Distance": WalkingDistanceHeuristic,
+    "Pattern Database": pattern_database_heuristic
+}
+
+def get_heuristic(name, goal_puzzle, control=None):
+    """Create the named heuristic provider for goal_puzzle, raises SearchStopped if control
+    stops a table build"""
+    if name not in HEURISTICS:
+        raise ValueError(f"Unknown heuristic: {name}")
+    return HEURISTICS[name](goal_puzzle, control)
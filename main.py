@@ -1,12 +1,25 @@
 import tkinter as tk
+from functools import partial
 from tkinter import ttk, messagebox, scrolledtext
 from puzzle import Puzzle
+from heuristics import HEURISTICS
 from search_algorithms import (
+    format_progress,
     solve_puzzle_bfs,
+    solve_puzzle_bidirectional_bfs,
     solve_puzzle_astar, 
+    solve_puzzle_weighted_astar,
+    solve_puzzle_arastar,
     solve_puzzle_gbfs,
-    get_solution_moves
+    solve_puzzle_idastar,
+    solve_puzzle_beam
 )
+from distance_table import missing_table_error, solve_puzzle_lookup
+from pattern_database import missing_table_error as missing_pattern_table_error
+from decomposition import solve_puzzle_decomposition
+from path_optimizer import solve_puzzle_shortened
+from solve_process import start_solve, solve_puzzle_portfolio
+from solution_cache import SolutionCache
 
 class SlidingPuzzleSolver:
     def __init__(self, root):
@@ -22,6 +35,10 @@ class SlidingPuzzleSolver:
         self.tiles = {}
         self.play_mode = False
         self.animating = False
+        self.active_solve = None
+        # Repeat solves of a board (or its transpose) skip the search
+        self.solution_cache = SolutionCache()
+        self.animation_cancelled = False
         self.selected_tile = None
         self.edit_mode = None
         self.highlight_tiles = set()
@@ -94,6 +111,11 @@ class SlidingPuzzleSolver:
         control_frame = ttk.LabelFrame(left_panel, text="Controls", padding="5")
         control_frame.pack(fill=tk.X, pady=3)
         
+        # Random walks to a Manhattan band keep 5x5+ shuffles solvable in practice, "Uniform" is a full shuffle
+        self.difficulty_var = tk.StringVar(value="Medium")
+        difficulty_combo = ttk.Combobox(control_frame, textvariable=self.difficulty_var,
+                                        values=["Easy", "Medium", "Hard", "Uniform"], state="readonly")
+        difficulty_combo.pack(fill=tk.X, pady=1)
         ttk.Button(control_frame, text="Shuffle", command=self.shuffle_puzzle).pack(fill=tk.X, pady=1)
         ttk.Button(control_frame, text="Reset", command=self.reset_puzzle).pack(fill=tk.X, pady=1)
         
@@ -114,11 +136,46 @@ class SlidingPuzzleSolver:
         algo_frame.pack(fill=tk.X, pady=3)
         
         self.algo_var = tk.StringVar(value="A*")
-        algorithms = ["BFS", "A*", "GBFS"]
+        algorithms = ["BFS", "Bidirectional BFS", "A*", "Weighted A*", "ARA*", "GBFS", "IDA*", "Beam Search",
+                      "Lookup Table", "Decomposition", "Portfolio", "Portfolio (optimal)"]
         algo_combo = ttk.Combobox(algo_frame, textvariable=self.algo_var, values=algorithms, state="readonly")
         algo_combo.pack(fill=tk.X, pady=1)
         
+        self.heuristic_var = tk.StringVar(value="Manhattan")
+        heuristic_combo = ttk.Combobox(algo_frame, textvariable=self.heuristic_var, values=list(HEURISTICS),
+                                       state="readonly")
+        heuristic_combo.pack(fill=tk.X, pady=1)
+        
+        # Weighted A* weight, ARA* starts from it and lowers it towards 1
+        weight_frame = ttk.Frame(algo_frame)
+        weight_frame.pack(fill=tk.X, pady=1)
+        ttk.Label(weight_frame, text="Weight (Weighted A*, ARA*):").pack(side=tk.LEFT)
+        self.weight_var = tk.DoubleVar(value=2.0)
+        ttk.Spinbox(weight_frame, from_=1.0, to=10.0, increment=0.5, textvariable=self.weight_var,
+                    width=5).pack(side=tk.RIGHT)
+        
+        beam_frame = ttk.Frame(algo_frame)
+        beam_frame.pack(fill=tk.X, pady=1)
+        ttk.Label(beam_frame, text="Beam width:").pack(side=tk.LEFT)
+        self.beam_width_var = tk.IntVar(value=1000)
+        ttk.Spinbox(beam_frame, from_=10, to=100000, increment=500, textvariable=self.beam_width_var,
+                    width=7).pack(side=tk.RIGHT)
+        
+        limit_frame = ttk.Frame(algo_frame)
+        limit_frame.pack(fill=tk.X, pady=1)
+        ttk.Label(limit_frame, text="Time limit (s, 0 = none):").pack(side=tk.LEFT)
+        self.time_limit_var = tk.IntVar(value=0)
+        ttk.Spinbox(limit_frame, from_=0, to=3600, textvariable=self.time_limit_var, width=5).pack(side=tk.RIGHT)
+        
+        # Non-optimal solutions go through the path optimizer before they are shown
+        self.shorten_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(algo_frame, text="Shorten solutions", variable=self.shorten_var).pack(fill=tk.X, pady=1)
+        
+        self.process_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(algo_frame, text="Solve in separate process", variable=self.process_var).pack(fill=tk.X, pady=1)
+        
         ttk.Button(algo_frame, text="Solve", command=self.solve_puzzle).pack(fill=tk.X, pady=3)
+        ttk.Button(algo_frame, text="Cancel", command=self.cancel_solve).pack(fill=tk.X, pady=1)
         
         # Animation speed control
         speed_frame = ttk.LabelFrame(left_panel, text="Speed (ms)", padding="5")
@@ -227,12 +284,19 @@ class SlidingPuzzleSolver:
         if self.animating:
             return
         
-        self.current_puzzle = Puzzle(self.rows, self.cols, gen_random=True, solvable=True)
+        difficulty = self.difficulty_var.get()
+        if difficulty == "Uniform":
+            self.current_puzzle = Puzzle(self.rows, self.cols, gen_random=True, solvable=True)
+        else:
+            # Walk away from the current goal, so custom goals get reachable shuffles too
+            min_distance, max_distance = Puzzle.difficulty_band(self.rows, self.cols, difficulty.lower())
+            self.current_puzzle = Puzzle.from_matrix(Puzzle.generate_random_walk_puzzle(
+                self.rows, self.cols, min_distance, max_distance, goal_matrix=self.goal_puzzle.matrix))
         self.selected_tile = None
         self.highlight_tiles.clear()
         self.draw_puzzle()
         self.clear_output()
-        self.status_var.set("Puzzle shuffled")
+        self.status_var.set(f"Puzzle shuffled ({difficulty.lower()})")
     
     def toggle_play_mode(self):
         """Toggle play mode on/off"""
@@ -405,7 +469,7 @@ class SlidingPuzzleSolver:
         algo_name = self.algo_var.get()
         
         # Strong warning for BFS/A* on large puzzles
-        if algo_name in ["BFS", "A*"] and total_tiles > 25:
+        if algo_name in ["BFS", "Bidirectional BFS", "A*"] and total_tiles > 25:
             result = messagebox.askyesno("⚠️ Algorithm Warning", 
                 f"Using {algo_name} on {self.rows}x{self.cols} ({total_tiles} tiles) is NOT recommended!\n\n"
                 f"❌ {algo_name} may take 5-30+ minutes and use several GB of RAM\n"
@@ -416,25 +480,41 @@ class SlidingPuzzleSolver:
                 return
         
         # General warning for very large puzzles
-        elif total_tiles > 49:
+        elif total_tiles > 49 and algo_name != "Decomposition":
             result = messagebox.askyesno("Large Puzzle Warning", 
                 f"Solving {self.rows}x{self.cols} ({total_tiles} tiles) may take very long.\n\n"
                 f"Algorithm Performance:\n"
                 f"• BFS - Slowest, most memory (not recommended > 5x5)\n"
                 f"• A* - Fast optimal, solution (not recommended > 5x5)\n"
-                f"• GBFS - Fastest but non optimal (usable up to 7x7)\n\n"
+                f"• GBFS - Fastest but non optimal (usable up to 7x7)\n"
+                f"• Decomposition - Non optimal, milliseconds at any size\n\n"
                 "Continue?")
             if not result:
                 return
         
-        # Check solvability
-        current_solvable = Puzzle.is_puzzle_solvable_2d(self.current_puzzle.matrix)
-        goal_solvable = Puzzle.is_puzzle_solvable_2d(self.goal_puzzle.matrix)
+        # Lookup tables past 3x3 take hours to build, never start one from the Solve button
+        if algo_name == "Lookup Table":
+            table_error = missing_table_error(self.rows, self.cols,
+                                              [val for row in self.goal_puzzle.matrix for val in row])
+            if table_error:
+                messagebox.showerror("No Distance Table", table_error)
+                return
+        
+        # Same for pattern databases past 4x4
+        if (self.heuristic_var.get() == "Pattern Database"
+                and algo_name in ["A*", "Weighted A*", "ARA*", "GBFS", "IDA*", "Beam Search"]):
+            table_error = missing_pattern_table_error(self.rows, self.cols,
+                                                      [val for row in self.goal_puzzle.matrix for val in row])
+            if table_error:
+                messagebox.showerror("No Pattern Database", table_error)
+                return
         
-        if current_solvable != goal_solvable:
-            messagebox.showerror("Unsolvable...git commit --allow-empty --date="2025-12-05 11:30" -m "edit"", 
+        # Check solvability
+        if not Puzzle.is_solvable_between_2d(self.current_puzzle.matrix, self.goal_puzzle.matrix):
+            messagebox.showerror("Unsolvable",
                 "This puzzle configuration is unsolvable!\n"
-                "Start and goal states have different solvability.")
+                "The goal cannot be reached from the start: their tile permutation parity\n"
+                "does not match the parity of the blank's distance between them.")
             return
         
         self.status_var.set("Solving puzzle.....,")
@@ -445,16 +525,41 @@ class SlidingPuzzleSolver:
         algo_name = self.algo_var.get()
         algorithm = {
             "BFS": solve_puzzle_bfs,
+            "Bidirectional BFS": solve_puzzle_bidirectional_bfs,
             "A*": solve_puzzle_astar,
-            "GBFS": solve_puzzle_gbfs
+            "Weighted A*": solve_puzzle_weighted_astar,
+            "ARA*": solve_puzzle_arastar,
+            "GBFS": solve_puzzle_gbfs,
+            "IDA*": solve_puzzle_idastar,
+            "Beam Search": solve_puzzle_beam,
+            "Lookup Table": solve_puzzle_lookup,
+            "Decomposition": solve_puzzle_decomposition,
+            "Portfolio": partial(solve_puzzle_portfolio, quality="any"),
+            "Portfolio (optimal)": partial(solve_puzzle_portfolio, quality="optimal")
         }.get(algo_name, solve_puzzle_astar)
         
+        # Informed searches take the selected heuristic
+        cache_name = algo_name
+        if algo_name in ["A*", "Weighted A*", "ARA*", "GBFS", "IDA*", "Beam Search"]:
+            algorithm = partial(algorithm, heuristic=self.heuristic_var.get())
+            cache_name = f"{algo_name} + {self.heuristic_var.get()}"
+        if algo_name in ["Weighted A*", "ARA*"]:
+            algorithm = partial(algorithm, weight=self.weight_var.get())
+            cache_name += f" (w={self.weight_var.get()})"
+        if algo_name == "Beam Search":
+            algorithm = partial(algorithm, beam_width=self.beam_width_var.get())
+            cache_name += f" (k={self.beam_width_var.get()})"
+        if self.shorten_var.get() and algo_name not in ["BFS", "Bidirectional BFS", "A*", "IDA*", "Lookup Table",
+                                                        "Portfolio (optimal)"]:
+            algorithm = partial(solve_puzzle_shortened, solver=algorithm)
+            cache_name += " (shortened)"
+        
         # Make a copy to solve
         puzzle_copy = Puzzle.from_puzzle(self.current_puzzle)
         
         try:
             # Solve in a way that we can animate live
-            self.solve_with_live_animation(algorithm, puzzle_copy, algo_name)
+            self.solve_with_live_animation(algorithm, puzzle_copy, algo_name, cache_name)
         
         except Exception as e:
             import traceback
@@ -463,65 +568,86 @@ class SlidingPuzzleSolver:
             self.status_var.set("Error solving puzzle")
             self.animating = False
     
-    def solve_with_live_animation(self, algorithm, puzzle_copy, algo_name):
+    def cancel_solve(self):
+        """Stop the running search, or the animation once the search has finished"""
+        if self.active_solve is not None:
+            self.active_solve.cancel()
+            self.status_var.set("Cancelling...")
+        elif self.animating:
+            self.animation_cancelled = True
+    
+    def solve_with_live_animation(self, algorithm, puzzle_copy, algo_name, cache_name=None):
         """Solve puzzle and animate in real-time"""
-        import threading
-        
         # Store original puzzle
         original_puzzle = Puzzle.from_puzzle(self.current_puzzle)
-        solution_data = {'solution': None, 'error': None}
-        
-        def solve_in_background():
-            try:
-                solution_data['solution'] = algorithm(puzzle_copy, self.goal_puzzle)
-            except Exception as e:
-                solution_data['error'] = str(e)
-        
-        # Start solving in background thread
-        solve_thread = threading.Thread(target=solve_in_background)
-        solve_thread.daemon = True
-        solve_thread.start()
+        goal_puzzle = Puzzle.from_puzzle(self.goal_puzzle)
+        cache_name = cache_name or algo_name
+        time_limit_s = self.time_limit_var.get()
+        
+        cached = self.solution_cache.get(cache_name, original_puzzle, goal_puzzle)
+        if cached is None:
+            # A child process keeps the GIL free for the UI, a thread is the fallback.
+            # The portfolio runs its engines in child processes itself, so it stays on a thread.
+            use_process = self.process_var.get() and not algo_name.startswith("Portfolio")
+            self.active_solve = start_solve(algorithm, puzzle_copy, self.goal_puzzle, use_process=use_process,
+                                            time_limit_ms=time_limit_s * 1000 if time_limit_s > 0 else None)
         
         # Wait for solution with periodic checks
         def check_solution():
-            if solve_thread.is_alive():
-                # Still solving, check again soon
+            if cached is not None:
+                solution = cached
+            elif not self.active_solve.poll():
+                # Still solving, show the latest progress and check again soon
+                if self.active_solve.progress:
+                    self.status_var.set(f"Solving: {format_progress(self.active_solve.progress)}")
                 self.root.after(100, check_solution)
+                return
             else:
                 # Solving finished
-                if solution_data['error']:
-                    messagebox.showerror("Error", f"Error solving: {solution_data['error']}")
-                    self.animating = False
-                    return
-                
-                solution = solution_data['solution']
-                
-                # Check if solution was found
-                if solution['solution_puzzle'] is None:
-                    messagebox.showerror("No Solution", "Could not find a solution to this puzzle.")
-                    self.status_var.set("No solution found")
+                background_solve, self.active_solve = self.active_solve, None
+                try:
+                    solution = background_solve.result()
+                except RuntimeError as e:
+                    messagebox.showerror("Error", f"Error solving: {e}")
                     self.animating = False
                     return
-                
-                # Get moves
-                if 'solution_moves' in solution:
-                    moves = solution['solution_moves']
-                else:
-                    moves = get_solution_moves(solution['solution_puzzle'])
-                
-                # Display results
-                self.display_solution(solution, moves, algo_name)
-                
-                # Reset to original and animate solution
+                self.solution_cache.put(cache_name, original_puzzle, goal_puzzle, solution)
+            
+            # Stopped early, show the path to the closest state reached instead
+            if solution['status'] not in ("solved", "unsolvable"):
+                self.display_solution(solution, solution['partial_moves'], algo_name)
                 self.current_puzzle = original_puzzle
                 self.draw_puzzle()
-                
-                # Animate solution
-                if moves:
-                    self.animate_solution(moves)
-                else:
-                    self.status_var.set("Puzzle already solved!")
-                    self.animating = False
+                self.animating = False
+                stopped = f"Search stopped ({solution['status'].replace('_', ' ')})"
+                if solution['partial_h'] is not None:
+                    stopped += f", closest state is {solution['partial_h']} away (heuristic)"
+                self.status_var.set(stopped)
+                return
+            
+            # Check if solution was found
+            if solution['solution_puzzle'] is None:
+                messagebox.showerror("No Solution", "Could not find a solution to this puzzle.")
+                self.status_var.set("No solution found")
+                self.animating = False
+                return
+            
+            # Get moves
+            moves = solution['solution_moves']
+            
+            # Display results
+            self.display_solution(solution, moves, algo_name)
+            
+            # Reset to original and animate solution
+            self.current_puzzle = original_puzzle
+            self.draw_puzzle()
+            
+            # Animate solution
+            if moves:
+                self.animate_solution(moves)
+            else:
+                self.status_var.set("Puzzle already solved!")
+                self.animating = False
         
         check_solution()
     
@@ -531,11 +657,34 @@ class SlidingPuzzleSolver:
         self.moves_text.delete(1.0, tk.END)
         
         # Summary
-        optimal = "(optimal)" if algo_name in ["BFS", "A*"] else "(non-optimal)"
+        optimal = ("(optimal)" if algo_name in ["BFS", "Bidirectional BFS", "A*", "IDA*", "Lookup Table",
+                                                "Portfolio (optimal)"]
+                   else "(non-optimal)")
+        if solution.get('engine'):
+            algo_name = f"{algo_name} (won by {solution['engine']})"
+        # Weighted A* and ARA* prove how far from optimal their solution can be
+        if solution.get('bound') is not None:
+            optimal = f"(within {solution['bound']:.2f}x optimal)" if solution['bound'] > 1 else "(optimal)"
+            if solution.get('stopped'):
+                optimal += f", best so far ({solution['stopped'].replace('_', ' ')})"
+        if solution['status'] not in ("solved", "unsolvable"):
+            optimal = f"to closest state, h={solution['partial_h']} ({solution['status'].replace('_', ' ')})"
+            if solution['partial_h'] is None:
+                optimal = f"({solution['status']}, no partial result)"
+        runtime = f"{solution['runtime_ms']:.3f}ms"
+        if solution.get('cached'):
+            runtime += f" (cached, first solve took {solution['cached_stats']['runtime_ms']:.3f}ms)"
         summary = (f"Algorithm: {algo_name}\n"
-                  f"Runtime: {solution['runtime_ms']:.3f}ms\n"
+                  f"Runtime: {runtime}\n"
                   f"Moves: {len(moves)} {optimal}\n"
                   f"Max states: {solution['max_puzzles_in_memory']}")
+        if solution.get('original_length') is not None:
+            summary += f"\nShortened from {solution['original_length']} moves"
+        if solution.get('layer_stats'):
+            peak_mb = solution['layer_stats'][-1]['memory_bytes'] / (1024 * 1024)
+            summary += f"\nLayers: {len(solution['layer_stats'])}, memory: {peak_mb:.1f}MB"
+        if solution.get('peak_memory_bytes'):
+            summary += f"\nPeak memory: {solution['peak_memory_bytes'] / (1024 * 1024):.1f}MB"
         self.summary_text.insert(1.0, summary)
         
         # Move list
@@ -551,6 +700,7 @@ class SlidingPuzzleSolver:
     def animate_solution(self, moves):
         """Animate the solution moves"""
         self.animating = True
+        self.animation_cancelled = False
         self.status_var.set("Animating solution...")
         self.root.update()
         self.animate_next_move(moves, 0)
@@ -566,6 +716,13 @@ class SlidingPuzzleSolver:
             self.animating = False
             return
         
+        if self.animation_cancelled:
+            self.animating = False
+            self.highlight_tiles.clear()
+            self.draw_puzzle()
+            self.status_var.set(f"Animation cancelled after {index} moves")
+            return
+        
         if index >= len(moves):
             self.animating = False
             self.highlight_tiles.clear()
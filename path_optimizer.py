@@ -0,0 +1,103 @@
+import time
+from puzzle import Puzzle, PackedBoard
+from search_algorithms import SearchControl, DIRECTION_NAMES, solve_puzzle_idastar
+
+INVERSE_MOVES = {"UP": "DOWN", "DOWN": "UP", "LEFT": "RIGHT", "RIGHT": "LEFT"}
+DIRECTION_CODES = {name: direction for direction, name in DIRECTION_NAMES.items()}
+
+# Moves per path slice re-solved optimally, and the IDA* node budget for each slice
+DEFAULT_WINDOW = 24
+WINDOW_NODE_LIMIT = 50000
+
+def cancel_inverses(moves):
+    """Drop every move that is immediately undone by the next one"""
+    kept = []
+    for move in moves:
+        if kept and kept[-1] == INVERSE_MOVES[move]:
+            kept.pop()
+        else:
+            kept.append(move)
+    return kept
+
+def path_states(board, state, moves):
+    """Packed states along a path, the start and the state after each move"""
+    targets = [dict(slides) for slides in board.slides]
+    states = [state]
+    for move in moves:
+        state = board.slide(state, targets[board.blank_index(state)][DIRECTION_CODES[move]])
+        states.append(state)
+    return states
+
+def cut_loops(board, start_state, moves):
+    """Cut out every stretch of the path that returns to a state it already passed"""
+    targets = [dict(slides) for slides in board.slides]
+    kept = []
+    states = [start_state]
+    # Position of each state on the kept path
+    position = {start_state: 0}
+    state = start_state
+    for move in moves:
+        state = board.slide(state, targets[board.blank_index(state)][DIRECTION_CODES[move]])
+        if state in position:
+            index = position[state]
+            for dropped in states[index + 1:]:
+                del position[dropped]
+            del states[index + 1:]
+            del kept[index:]
+        else:
+            position[state] = len(states)
+            states.append(state)
+            kept.append(move)
+    return kept
+
+def resolve_windows(board, start_state, moves, window=DEFAULT_WINDOW, control=None):
+    """Replace slices of window moves with an optimal path between their end states.
+    
+    Each slice is solved by IDA* under WINDOW_NODE_LIMIT nodes. After a shorter
+    slice is spliced in, the scan steps back half a window to retry the seams.
+    Returns the new moves and the nodes expanded.
+    """
+    moves = list(moves)
+    states = path_states(board, start_state, moves)
+    nodes_expanded = 0
+    index = 0
+    while index + 2 < len(moves):
+        if control is not None and control.stop_reason(nodes_expanded):
+            break
+        end = min(index + window, len(moves))
+        start = Puzzle.from_packed(states[index], board)
+        goal = Puzzle.from_packed(states[end], board)
+        result = solve_puzzle_idastar(start, goal, control=SearchControl(node_limit=WINDOW_NODE_LIMIT))
+        nodes_expanded += result['nodes_expanded']
+        if result['status'] == 'solved' and len(result['solution_moves']) < end - index:
+            moves[index:end] = result['solution_moves']
+            states = path_states(board, start_state, moves)
+            index = max(0, index - window // 2)
+        else:
+            index += window // 2
+    return moves, nodes_expanded
+
+def shorten_path(puzzle, moves, window=DEFAULT_WINDOW, control=None):
+    """Shorter move list reaching the same state: cancels inverses, cuts loops and
+    re-solves windows optimally. Returns the moves and the nodes expanded."""
+    board = PackedBoard(puzzle.rows, puzzle.cols)
+    start_state = board.pack(puzzle.matrix)
+    moves = cut_loops(board, start_state, cancel_inverses(moves))
+    return resolve_windows(board, start_state, moves, window, control)
+
+def shorten_result(puzzle, result, window=DEFAULT_WINDOW, control=None):
+    """Copy of a solved result with its path shortened, adds 'original_length'"""
+    if result['status'] != 'solved':
+        return result
+    start_time = time.time()
+    moves, nodes_expanded = shorten_path(puzzle, result['solution_moves'], window, control)
+    result = dict(result)
+    result['original_length'] = len(result['solution_moves'])
+    result['solution_moves'] = moves
+    result['nodes_expanded'] += nodes_expanded
+    result['runtime_ms'] += (time.time() - start_time) * 1000
+    return result
+
+def solve_puzzle_shortened(puzzle, goal_puzzle, solver, control=None, window=DEFAULT_WINDOW):
+    """Any solver followed by shorten_result, picklable as partial(solve_puzzle_shortened, solver=...)"""
+    return shorten_result(puzzle, solver(puzzle, goal_puzzle, control=control), window, control)
@@ -0,0 +1,214 @@
+import hashlib
+import mmap
+import os
+from array import array
+from puzzle import PackedBoard, permutation_rank, permutation_unrank
+from heuristics import Heuristic, SearchStopped
+
+# Tile group sizes per board size, groups are taken in goal order (row-major goal cells).
+# 4x4 5-5-5 builds in ~1.5 minutes. A 6-tile 4x4 group takes ~6 minutes and ~200MB,
+# so 6-6-3 is opt-in via partition=(6, 6, 3). On 5x5 each 5-tile group needs ~160MB of
+# flags and tens of minutes, a 6-tile group ~3GB.
+DEFAULT_PARTITIONS = {
+    (4, 4): (5, 5, 5),
+    (5, 5): (5, 5, 5, 5, 4)
+}
+
+# Largest group used when a board size has no entry in DEFAULT_PARTITIONS
+DEFAULT_GROUP_SIZE = 4
+
+# Solves build missing tables up to 4x4 (minutes), larger boards need ~160MB and tens of
+# minutes per group (~1GB per 4-tile group on 8x8), so they are only built ahead of time
+# with "python pattern_database.py R C"
+MAX_BUILT_ON_SOLVE_CELLS = 16
+
+PATTERN_DATABASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pattern_databases")
+
+# Header: magic, rows, cols, group size, then the group's tiles one byte each
+FILE_MAGIC = b"SPDB"
+
+# Table value for pattern placements the retrograde search never reached
+UNREACHED = 255
+
+# Retrograde search state flags, per ranked placement and blank cell
+UNSEEN = 0
+QUEUED = 1
+EXPANDED = 2
+
+def default_partition(rows, cols):
+    """Group sizes for a board, DEFAULT_PARTITIONS or chunks of DEFAULT_GROUP_SIZE"""
+    if (rows, cols) in DEFAULT_PARTITIONS:
+        return DEFAULT_PARTITIONS[(rows, cols)]
+    tile_count = rows * cols - 1
+    sizes = [DEFAULT_GROUP_SIZE] * (tile_count // DEFAULT_GROUP_SIZE)
+    if tile_count % DEFAULT_GROUP_SIZE:
+        sizes.append(tile_count % DEFAULT_GROUP_SIZE)
+    return tuple(sizes)
+
+def partition_tiles(goal_tiles, partition):
+    """Split the goal's tiles into disjoint groups, in order of their goal cells"""
+    ordered = [tile for tile in goal_tiles if tile != 0]
+    if sum(partition) != len(ordered):
+        raise ValueError(f"Partition {partition} does not cover {len(ordered)} tiles")
+    groups = []
+    for group_size in partition:
+        groups.append(tuple(ordered[:group_size]))
+        ordered = ordered[group_size:]
+    return groups
+
+def table_entries(size, group_size):
+    entries = 1
+    for index in range(group_size):
+        entries *= size - index
+    return entries
+
+def build_pattern_table(rows, cols, goal_tiles, group, control=None):
+    """Retrograde BFS from the goal, returns a bytearray of moves per ranked group placement.
+    
+    Only slides of group tiles are counted; the blank walks through the other
+    cells for free. That keeps tables of disjoint groups additive. Each
+    (placement, blank cell) state is queued at most once, as one int in an
+    array, so a layer costs 8 bytes per state. control, a SearchControl, is
+    polled for cancellation and its time limit, a stop raises SearchStopped.
+    """
+    size = rows * cols
+    group_size = len(group)
+    board = PackedBoard(rows, cols)
+    neighbors = [[target for _, target in board.slides[cell]] for cell in range(size)]
+    table = bytearray([UNREACHED]) * table_entries(size, group_size)
+    # UNSEEN, QUEUED for the next layer, or EXPANDED, per rank * size + blank cell
+    status = bytearray(len(table) * size)
+    check_mask = control.CHECK_INTERVAL - 1 if control else 0
+    processed = 0
+    
+    start_rank = permutation_rank([goal_tiles.index(tile) for tile in group], size)
+    layer = array('q', [start_rank * size + goal_tiles.index(0)])
+    distance = 0
+    while layer:
+        next_layer = array('q')
+        for key in layer:
+            if status[key] == EXPANDED:
+                continue
+            if control and not processed & check_mask:
+                # Table states are not search expansions, the node limit does not apply
+                stop_reason = control.stop_reason(0)
+                if stop_reason:
+                    raise SearchStopped(stop_reason)
+            processed += 1
+            rank, blank = divmod(key, size)
+            base = rank * size
+            positions = permutation_unrank(rank, size, group_size)
+            occupied = {position: index for index, position in enumerate(positions)}
+            
+            # Zero-cost closure: every cell the blank reaches without moving a group tile
+            region = [blank]
+            status[key] = EXPANDED
+            for cell in region:
+                for neighbor in neighbors[cell]:
+                    if neighbor not in occupied and status[base + neighbor] != EXPANDED:
+                        status[base + neighbor] = EXPANDED
+                        region.append(neighbor)
+            if table[rank] == UNREACHED:
+                table[rank] = distance
+            
+            # Unit-cost moves: a group tile next to the region slides into it
+            for cell in region:
+                for neighbor in neighbors[cell]:
+                    if neighbor in occupied:
+                        moved = list(positions)
+                        moved[occupied[neighbor]] = cell
+                        moved_key = permutation_rank(moved, size) * size + neighbor
+                        if status[moved_key] == UNSEEN:
+                            status[moved_key] = QUEUED
+                            next_layer.append(moved_key)
+        layer = next_layer
+        distance += 1
+    
+    return table
+
+def pattern_table_path(rows, cols, goal_tiles, group, directory=PATTERN_DATABASE_DIR):
+    """Table file name, keyed by board size, goal layout and group tiles"""
+    digest = hashlib.sha1(bytes(goal_tiles) + b"|" + bytes(group)).hexdigest()[:16]
+    return os.path.join(directory, f"pdb_{rows}x{cols}_{digest}.bin")
+
+def save_pattern_table(path, rows, cols, group, table):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as file:
+        file.write(FILE_MAGIC + bytes([rows, cols, len(group)]) + bytes(group))
+        file.write(table)
+    os.replace(temp_path, path)
+
+def load_pattern_table(path, rows, cols, group):
+    """Memory-map a saved table, returns a bytes-like view of its entries"""
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    header = FILE_MAGIC + bytes([rows, cols, len(group)]) + bytes(group)
+    if data[:len(header)] != header or len(data) - len(header) != table_entries(rows * cols, len(group)):
+        data.close()
+        raise ValueError(f"Pattern database {path} does not match this board")
+    return memoryview(data)[len(header):]
+
+def missing_table_error(rows, cols, goal_tiles, partition=None, directory=PATTERN_DATABASE_DIR):
+    """Why a solve can't use the tables yet: the board is too large to build them on solve, else None"""
+    if rows * cols <= MAX_BUILT_ON_SOLVE_CELLS:
+        return None
+    groups = partition_tiles(goal_tiles, partition or default_partition(rows, cols))
+    if all(os.path.exists(pattern_table_path(rows, cols, goal_tiles, group, directory)) for group in groups):
+        return None
+    return (f"No pattern databases for this {rows}x{cols} goal yet, building them takes tens of minutes "
+            f"per tile group.\nBuild the default goal's tables ahead of time with: "
+            f"python pattern_database.py {rows} {cols}")
+
+def get_pattern_table(rows, cols, goal_tiles, group, directory=PATTERN_DATABASE_DIR, control=None):
+    """Load a group's table from disk, building and saving it first if missing"""
+    path = pattern_table_path(rows, cols, goal_tiles, group, directory)
+    if not os.path.exists(path):
+        save_pattern_table(path, rows, cols, group,
+                           build_pattern_table(rows, cols, goal_tiles, group, control))
+    return load_pattern_table(path, rows, cols, group)
+
+class PatternDatabaseHeuristic(Heuristic):
+    """Disjoint additive pattern databases, the sum of each tile group's exact solve cost"""
+    
+    # Tables are minimised over blank cells, so one slide can lower a group's cost by more than 1
+    consistent = False
+    
+    def __init__(self, goal_puzzle, partition=None, directory=PATTERN_DATABASE_DIR, control=None):
+        super().__init__(goal_puzzle)
+        self.size = self.rows * self.cols
+        goal_tiles = [val for row in goal_puzzle.matrix for val in row]
+        table_error = missing_table_error(self.rows, self.cols, goal_tiles, partition, directory)
+        if table_error:
+            raise ValueError(table_error)
+        self.groups = partition_tiles(goal_tiles, partition or default_partition(self.rows, self.cols))
+        self.tables = [get_pattern_table(self.rows, self.cols, goal_tiles, group, directory, control)
+                       for group in self.groups]
+        self.tile_group = {tile: index for index, group in enumerate(self.groups) for tile in group}
+    
+    def group_cost(self, tiles, group_index):
+        positions = [tiles.index(tile) for tile in self.groups[group_index]]
+        return self.tables[group_index][permutation_rank(positions, self.size)]
+    
+    def evaluate(self, tiles):
+        return sum(self.group_cost(tiles, index) for index in range(len(self.groups)))
+    
+    def update(self, h, tiles, tile, from_cell, to_cell):
+        # Only the moved tile's group changes its placement
+        group_index = self.tile_group[tile]
+        new_cost = self.group_cost(tiles, group_index)
+        tiles[from_cell], tiles[to_cell] = tile, 0
+        old_cost = self.group_cost(tiles, group_index)
+        tiles[from_cell], tiles[to_cell] = 0, tile
+        return h - old_cost + new_cost
+
+if __name__ == "__main__":
+    import sys
+    from puzzle import Puzzle
+    
+    # Precompute the default tables for the default goal, e.g. "python pattern_database.py 4 4"
+    rows, cols = (int(arg) for arg in sys.argv[1:3])
+    goal_tiles = [val for row in Puzzle(rows, cols, gen_random=False).matrix for val in row]
+    for group in partition_tiles(goal_tiles, default_partition(rows, cols)):
+        get_pattern_table(rows, cols, goal_tiles, group)
+    print(f"Pattern databases for {rows}x{cols} ready in {PATTERN_DATABASE_DIR}")
@@ -1,3 +1,4 @@
+import math
 import random
 
 class SlideDirection:
@@ -7,8 +8,239 @@ class SlideDirection:
     LEFT = 3
     RIGHT = 4
 
+# Blank displacement (row, col) for each slide direction
+SLIDE_OFFSETS = {
+    SlideDirection.UP: (-1, 0),
+    SlideDirection.DOWN: (1, 0),
+    SlideDirection.LEFT: (0, -1),
+    SlideDirection.RIGHT: (0, 1)
+}
+
+# Slide that undoes each direction, INITIAL maps to itself so nothing is pruned
+OPPOSITE_DIRECTIONS = {
+    SlideDirection.INITIAL: SlideDirection.INITIAL,
+    SlideDirection.UP: SlideDirection.DOWN,
+    SlideDirection.DOWN: SlideDirection.UP,
+    SlideDirection.LEFT: SlideDirection.RIGHT,
+    SlideDirection.RIGHT: SlideDirection.LEFT
+}
+
+# Boards in this cell range track visited states by permutation rank. Up to 9 cells the
+# whole state space fits a plain set in ~10MB, which is several times faster to probe.
+MIN_RANKED_CELLS = 10
+MAX_RANKED_CELLS = 12
+
+# Difficulty levels as fractions of a uniform shuffle's expected Manhattan distance
+DIFFICULTY_LEVELS = {
+    "easy": (0.25, 0.4),
+    "medium": (0.4, 0.65),
+    "hard": (0.65, 0.9)
+}
+
+# The same levels as inclusive optimal solution length ranges, around the uniform shuffle's
+# mean optimal length (~22 moves on 3x3, ~35 on 3x4). Lengths are proven by IDA*, so only
+# boards where that takes about a second are listed.
+OPTIMAL_DIFFICULTY_BANDS = {
+    (3, 3): {"easy": (10, 14), "medium": (16, 20), "hard": (22, 26)},
+    (3, 4): {"easy": (16, 22), "medium": (24, 30), "hard": (32, 38)},
+    (4, 3): {"easy": (16, 22), "medium": (24, 30), "hard": (32, 38)}
+}
+
+def permutation_rank(values, size=None):
+    """Lehmer rank of distinct values drawn from range(size), in range size! / (size - len(values))!
+    
+    With size omitted the values are a full permutation and the rank is in range n!.
+    """
+    size = len(values) if size is None else size
+    rank = 0
+    used = 0
+    for index, value in enumerate(values):
+        # Values already used earlier are skipped when numbering this one
+        rank = rank * (size - index) + value - bin(used & ((1 << value) - 1)).count("1")
+        used |= 1 << value
+    return rank
+
+def permutation_unrank(rank, size, length=None):
+    """Inverse of permutation_rank, returns the list of values"""
+    length = size if length is None else length
+    digits = []
+    for index in reversed(range(length)):
+        rank, digit = divmod(rank, size - index)
+        digits.append(digit)
+    unused = list(range(size))
+    return [unused.pop(digit) for digit in reversed(digits)]
+
+def permutation_parity(values):
+    """Parity of a permutation of range(len(values)), 1 if odd, by cycle decomposition in O(n)
+    
+    A cycle of length k is k - 1 transpositions, so the parity is n minus the cycle count.
+    """
+    seen = bytearray(len(values))
+    cycles = 0
+    for start in range(len(values)):
+        if not seen[start]:
+            cycles += 1
+            index = start
+            while not seen[index]:
+                seen[index] = 1
+                index = values[index]
+    return (len(values) - cycles) & 1
+
+class RankedStateSet:
+    """Visited set of packed states, a plain set until it would outgrow one bit per permutation rank.
+    
+    Short solves never allocate the size! / 8 byte bit array (60MB on 12 cells).
+    """
+    
+    # Rough bytes per packed int held in a set, hash table slot plus the int itself
+    SET_ENTRY_BYTES = 64
+    
+    def __init__(self, board):
+        self.board = board
+        self.bits_length = (math.factorial(board.size) + 7) // 8
+        self.switch_count = self.bits_length // self.SET_ENTRY_BYTES
+        self.states = set()
+        self.bits = None
+        self.count = 0
+        
+        # Rank of the last state looked up, solvers test a state and then add it
+        self.last_state = None
+        self.last_rank = 0
+    
+    def state_rank(self, state):
+        if state != self.last_state:
+            self.last_state = state
+            self.last_rank = self.board.rank(state)
+        return self.last_rank
+    
+    def __contains__(self, state):
+        if self.bits is None:
+            return state in self.states
+        rank = self.state_rank(state)
+        return self.bits[rank >> 3] >> (rank & 7) & 1 == 1
+    
+    def add(self, state):
+        if self.bits is None:
+            self.states.add(state)
+            self.count = len(self.states)
+            if self.count > self.switch_count:
+                self.switch_to_bits()
+            return
+        rank = self.state_rank(state)
+        if not self.bits[rank >> 3] >> (rank & 7) & 1:
+            self.bits[rank >> 3] |= 1 << (rank & 7)
+            self.count += 1
+    
+    def switch_to_bits(self):
+        self.bits = bytearray(self.bits_length)
+        for state in self.states:
+            rank = self.board.rank(state)
+            self.bits[rank >> 3] |= 1 << (rank & 7)
+        self.states = None
+    
+    def __len__(self):
+        return self.count
+    
+    def __sizeof__(self):
+        table = self.states if self.bits is None else self.bits
+        return object.__sizeof__(self) + table.__sizeof__()
+
+class PackedBoard:
+    """Packs board states of one size into single ints for fast hashing and sliding.
+    
+    Cell i holds its tile in bits [i * tile_bits, (i + 1) * tile_bits), 4 bits per
+    tile up to 4x4 and wider fields for larger boards. The blank's cell index is
+    stored above the tile fields so slides never need to search for it.
+    """
+    
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.tile_bits = max(4, (self.size - 1).bit_length())
+        self.tile_mask = (1 << self.tile_bits) - 1
+        self.blank_shift = self.size * self.tile_bits
+        self.tiles_mask = (1 << self.blank_shift) - 1
+        # Built on first rank() call, only boards up to MAX_RANKED_CELLS are ranked
+        self.rank_steps = None
+        self.popcounts = None
+        
+        # Legal (direction, target cell) pairs for every blank cell
+        self.slides = []
+        for index in range(self.size):
+            row, col = divmod(index, cols)
+            self.slides.append(tuple(
+                (direction, (row + d_row) * cols + col + d_col)
+                for direction, (d_row, d_col) in SLIDE_OFFSETS.items()
+                if 0 <= row + d_row < rows and 0 <= col + d_col < cols
+            ))
+    
+    def pack(self, matrix):
+        """Encode a puzzle matrix as a packed int"""
+        state = 0
+        blank = 0
+        for index, val in enumerate(val for row in matrix for val in row):
+            state |= val << (index * self.tile_bits)
+            if val == 0:
+                blank = index
+        return state | (blank << self.blank_shift)
+    
+    def unpack(self, state):
+        """Decode a packed int back into a puzzle matrix"""
+        tiles = self.to_tiles(state)
+        return [tiles[row * self.cols:(row + 1) * self.cols] for row in range(self.rows)]
+    
+    def to_tiles(self, state):
+        """Decode a packed int into a flat row-major tile list"""
+        return [(state >> (index * self.tile_bits)) & self.tile_mask for index in range(self.size)]
+    
+    def blank_index(self, state):
+        return state >> self.blank_shift
+    
+    def rank(self, state):
+        """Permutation rank of a packed state, see permutation_rank"""
+        if self.rank_steps is None:
+            # (shift, radix) per cell, the last cell always contributes 0
+            self.rank_steps = [(index * self.tile_bits, self.size - index) for index in range(self.size - 1)]
+            self.popcounts = bytes(bin(used).count("1") for used in range(1 << self.size))
+        
+        tile_mask, popcounts = self.tile_mask, self.popcounts
+        rank = 0
+        used = 0
+        for shift, radix in self.rank_steps:
+            tile = (state >> shift) & tile_mask
+            rank = rank * radix + tile - popcounts[used & ((1 << tile) - 1)]
+            used |= 1 << tile
+        return rank
+    
+    def visited_set(self):
+        """Empty visited set for packed states, switching to rank-indexed bits on 10-12 cell boards"""
+        return RankedStateSet(self) if MIN_RANKED_CELLS <= self.size <= MAX_RANKED_CELLS else set()
+    
+    def tile_at(self, state, index):
+        return (state >> (index * self.tile_bits)) & self.tile_mask
+    
+    def slide(self, state, target):
+        """Move the tile at target cell into the blank, returns the new packed state"""
+        blank_shift = (state >> self.blank_shift) * self.tile_bits
+        target_shift = target * self.tile_bits
+        tile = (state >> target_shift) & self.tile_mask
+        # Blank field is 0, so XOR moves the tile out of target and into the blank's cell
+        return (((state & self.tiles_mask) ^ (tile << target_shift) ^ (tile << blank_shift))
+                | (target << self.blank_shift))
+    
+    def manhattan_sum(self, state, goal_mapping):
+        """Manhattan distance of a packed state to the goal described by goal_mapping"""
+        total = 0
+        for index in range(self.size):
+            tile = (state >> (index * self.tile_bits)) & self.tile_mask
+            if tile:
+                goal = goal_mapping[tile]
+                total += abs(index // self.cols - goal['row']) + abs(index % self.cols - goal['col'])
+        return total
+
 class Puzzle:
-    def __init__(self, rows, cols, gen_random=True, solvable=True):
+    def __init__(self, rows, cols, gen_random=True, solvable=True, seed=None, difficulty=None):
         self.rows = rows
         self.cols = cols
         self.blank_row = 0
@@ -19,7 +251,12 @@ class Puzzle:
         self.cost_from_start = 0
         
         if gen_random:
-            self.matrix = self.generate_random_puzzle(rows, cols, solvable)
+            if difficulty is not None:
+                # Walked boards are always solvable, solvable is ignored
+                min_distance, max_distance = self.difficulty_band(rows, cols, difficulty)
+                self.matrix = self.generate_random_walk_puzzle(rows, cols, min_distance, max_distance, seed)
+            else:
+                self.matrix = self.generate_random_puzzle(rows, cols, solvable, seed)
             # Find blank tile position
             for row_idx in range(rows):
                 for col_idx in range(cols):
@@ -61,18 +298,70 @@ class Puzzle:
         return puzzle
     
     @staticmethod
-    def generate_random_puzzle(rows, cols, solvable):
-        """Returns random puzzle with defined solvability"""
+    def generate_random_puzzle(rows, cols, solvable, seed=None):
+        """Returns random puzzle with defined solvability, the same board for the same seed"""
+        rng = random.Random(seed) if seed is not None else random
         values = list(range(rows * cols))
+        rng.shuffle(values)
         
-        while True:
-            random.shuffle(values)
-            if Puzzle.is_puzzle_solvable_1d(values, rows, cols) == solvable:
-                break
+        # Swapping two tiles flips the parity without moving the blank, no need to reshuffle
+        if Puzzle.is_puzzle_solvable_1d(values, rows, cols) != solvable:
+            first, second = [index for index, value in enumerate(values) if value != 0][:2]
+            values[first], values[second] = values[second], values[first]
         
         # Turn 1D array into puzzle matrix
         return [[values[row * cols + col] for col in range(cols)] for row in range(rows)]
     
+    @staticmethod
+    def expected_manhattan(rows, cols):
+        """Mean Manhattan distance of a uniformly shuffled board from the default goal"""
+        return (rows * cols - 1) * ((rows * rows - 1) / (3 * rows) + (cols * cols - 1) / (3 * cols))
+    
+    @staticmethod
+    def difficulty_band(rows, cols, level):
+        """Manhattan distance range (low, high) for one of DIFFICULTY_LEVELS"""
+        low, high = DIFFICULTY_LEVELS[level]
+        expected = Puzzle.expected_manhattan(rows, cols)
+        return max(1, round(low * expected)), max(1, round(high * expected))
+    
+    @staticmethod
+    def generate_random_walk_puzzle(rows, cols, min_distance, max_distance=None, seed=None, goal_matrix=None,
+                                    min_steps=0):
+        """Returns a board reached from the goal by a seeded random walk, at a Manhattan
+        distance drawn from [min_distance, max_distance].
+        
+        The blank wanders without undoing its last slide for at least min_steps slides
+        (default 0), then until the distance hits the drawn target. Walked boards are
+        solvable by construction. Targets up to about expected_manhattan() are
+        reached quickly, far higher ones may never be.
+        """
+        rng = random.Random(seed) if seed is not None else random
+        goal_matrix = goal_matrix or Puzzle(rows, cols, gen_random=False).matrix
+        target = rng.randint(min_distance, min_distance if max_distance is None else max_distance)
+        
+        table = Puzzle.get_manhattan_table(Puzzle.get_matrix_mapping(goal_matrix), rows, cols)
+        neighbors = [[index + offset_row * cols + offset_col for offset_row, offset_col in SLIDE_OFFSETS.values()
+                      if 0 <= index // cols + offset_row < rows and 0 <= index % cols + offset_col < cols]
+                     for index in range(rows * cols)]
+        tiles = [val for row in goal_matrix for val in row]
+        blank = tiles.index(0)
+        previous = None
+        distance = 0
+        
+        step_limit = min_steps + 1000 * (target + 1)
+        for steps in range(step_limit):
+            if steps >= min_steps and distance == target:
+                break
+            cell = rng.choice([cell for cell in neighbors[blank] if cell != previous])
+            tile = tiles[cell]
+            distance += table[tile][blank] - table[tile][cell]
+            tiles[blank], tiles[cell] = tile, 0
+            previous, blank = blank, cell
+        else:
+            raise ValueError(f"Random walk did not reach Manhattan distance {target} in {step_limit} steps")
+        
+        return [tiles[row * cols:(row + 1) * cols] for row in range(rows)]
+    
     def can_slide_left(self):
         return self.blank_col > 0
     
@@ -116,13 +405,32 @@ class Puzzle:
     def update_manhattan_sum(self, goal_mapping):
         """Updates manhattan sum for this puzzle state"""
         self.manhattan_sum = sum(
-            abs(row - goal_mapping[self.matrix[row][col]]['row']) + 
+            abs(row - goal_mapping[self.matrix[row][col]]['row']) +
             abs(col - goal_mapping[self.matrix[row][col]]['col'])
             for row in range(self.rows)
             for col in range(self.cols)
             if self.matrix[row][col] != 0
         )
     
+    def update_manhattan_sum_after_slide(self, parent, goal_mapping):
+        """Derive manhattan sum from the parent's after a single slide, only one tile moved"""
+        # The moved tile now sits where the parent's blank was
+        goal = goal_mapping[self.matrix[parent.blank_row][parent.blank_col]]
+        self.manhattan_sum = (parent.manhattan_sum
+                              - abs(self.blank_row - goal['row']) - abs(self.blank_col - goal['col'])
+                              + abs(parent.blank_row - goal['row']) + abs(parent.blank_col - goal['col']))
+    
+    @staticmethod
+    def get_manhattan_table(goal_mapping, rows, cols):
+        """Manhattan distance of every tile from every cell, indexed table[tile][cell]"""
+        table = [[0] * (rows * cols) for _ in range(rows * cols)]
+        for tile, goal in goal_mapping.items():
+            if tile == 0:
+                continue
+            for index in range(rows * cols):
+                table[tile][index] = abs(index // cols - goal['row']) + abs(index % cols - goal['col'])
+        return table
+    
     @staticmethod
     def get_matrix_mapping(matrix):
         """Map goal state's (row, col) for each tile value"""
@@ -133,7 +441,7 @@ class Puzzle:
         }
     
     def generate_neighbors(self, goal_mapping=None):
-        """Generate all valid neighboring puzzle states"""
+        """Generate all valid neighboring puzzle states, manhattan sums derive from this puzzle's"""
         neighbors = []
         
         if self.can_slide_up() and self.last_slide_direction != SlideDirection.DOWN:
@@ -143,7 +451,7 @@ class Puzzle:
             neighbor.came_from = self
             neighbor.cost_from_start = self.cost_from_start + 1
             if goal_mapping:
-                neighbor.update_manhattan_sum(goal_mapping)
+                neighbor.update_manhattan_sum_after_slide(self, goal_mapping)
             neighbors.append(neighbor)
         
         if self.can_slide_down() and self.last_slide_direction != SlideDirection.UP:
@@ -153,7 +461,7 @@ class Puzzle:
             neighbor.came_from = self
             neighbor.cost_from_start = self.cost_from_start + 1
             if goal_mapping:
-                neighbor.update_manhattan_sum(goal_mapping)
+                neighbor.update_manhattan_sum_after_slide(self, goal_mapping)
             neighbors.append(neighbor)
         
         if self.can_slide_left() and self.last_slide_direction != SlideDirection.RIGHT:
@@ -163,7 +471,7 @@ class Puzzle:
             neighbor.came_from = self
             neighbor.cost_from_start = self.cost_from_start + 1
             if goal_mapping:
-                neighbor.update_manhattan_sum(goal_mapping)
+                neighbor.update_manhattan_sum_after_slide(self, goal_mapping)
             neighbors.append(neighbor)
         
         if self.can_slide_right() and self.last_slide_direction != SlideDirection.LEFT:
@@ -173,7 +481,7 @@ class Puzzle:
             neighbor.came_from = self
             neighbor.cost_from_start = self.cost_from_start + 1
             if goal_mapping:
-                neighbor.update_manhattan_sum(goal_mapping)
+                neighbor.update_manhattan_sum_after_slide(self, goal_mapping)
             neighbors.append(neighbor)
         
         return neighbors
@@ -188,22 +496,17 @@ class Puzzle:
     
     @staticmethod
     def is_puzzle_solvable_1d(arr, rows, cols):
-        """Check if puzzle is solvable based on inversion count"""
-        inversions = 0
-        for i in range(len(arr)):
-            if arr[i] == 0:
-                blank_row = i // cols
-                continue
-            for j in range(i + 1, len(arr)):
-                if arr[j] != 0 and arr[i] > arr[j]:
-                    inversions += 1
+        """Check if puzzle can reach the default goal, based on inversion parity"""
+        blank_row = arr.index(0) // cols
+        # Inversion parity of the tiles without the blank is their permutation's parity
+        inversions = permutation_parity([val - 1 for val in arr if val != 0])
         
         # Odd columns: Number of inversions must be even
         if cols % 2:
             return inversions % 2 == 0
         else:
-            # Even columns: inversions + blank row must be odd
-            return (inversions + blank_row) % 2 == 1
+            # Even columns: inversions + blank row must match the goal's blank row (the last one)
+            return (inversions + blank_row) % 2 == (rows - 1) % 2
     
     @staticmethod
     def is_puzzle_solvable_2d(matrix):
@@ -211,6 +514,49 @@ class Puzzle:
         arr = [val for row in matrix for val in row]
         return Puzzle.is_puzzle_solvable_1d(arr, len(matrix), len(matrix[0]))
     
+    @staticmethod
+    def is_solvable_between_1d(arr, goal_arr, rows, cols):
+        """Check if start can reach goal, for any goal layout, in O(n)
+        
+        Every slide is one transposition and moves the blank one cell, so the
+        start-to-goal tile permutation and the blank's Manhattan distance must
+        have the same parity.
+        """
+        goal_index = [0] * len(goal_arr)
+        for index, val in enumerate(goal_arr):
+            goal_index[val] = index
+        parity = permutation_parity([goal_index[val] for val in arr])
+        
+        blank, goal_blank = arr.index(0), goal_index[0]
+        blank_distance = abs(blank // cols - goal_blank // cols) + abs(blank % cols - goal_blank % cols)
+        return parity == blank_distance & 1
+    
+    @staticmethod
+    def is_solvable_between_2d(matrix, goal_matrix):
+        """Check if 2D puzzle matrix can reach the goal matrix"""
+        arr = [val for row in matrix for val in row]
+        goal_arr = [val for row in goal_matrix for val in row]
+        return Puzzle.is_solvable_between_1d(arr, goal_arr, len(matrix), len(matrix[0]))
+    
     def to_string(self):
         """Convert matrix to string for hashing"""
         return str(self.matrix)
+    
+    def to_key(self):
+        """Convert matrix to flat tuple, a compact hashable state key"""
+        return tuple(val for row in self.matrix for val in row)
+    
+    @staticmethod
+    def from_packed(state, board):
+        """Create puzzle from a packed int"""
+        return Puzzle.from_matrix(board.unpack(state))
+    
+    def to_bytes(self):
+        """Compact encoding for other processes: rows, cols, then the tiles row-major, one byte each"""
+        return bytes([self.rows, self.cols]) + bytes(val for row in self.matrix for val in row)
+    
+    @staticmethod
+    def from_bytes(data):
+        """Create puzzle from to_bytes() output"""
+        rows, cols = data[0], data[1]
+        return Puzzle.from_matrix([list(data[2 + row * cols:2 + (row + 1) * cols]) for row in range(rows)])
@@ -2,6 +2,7 @@
 """
 Sliding Puzzle Solver - Launcher Script
 This is the main entry point for the application.
+"python run.py batch ..." runs the headless batch solver instead, see batch_solve.py.
 """
 
 import sys
@@ -10,10 +11,15 @@ import os
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Import and run main application
-from main import main
-
 if __name__ == "__main__":
-    print("Starting Sliding Puzzle Solver...")
-    print("Close the window to exit.")
-    main()
+    if sys.argv[1:2] == ["batch"]:
+        # Headless, never imports tkinter
+        from batch_solve import main as batch_main
+        batch_main(sys.argv[2:])
+    else:
+        # Import and run main application. Imported here, so solver worker
+        # processes that re-import this script skip loading the GUI.
+        from main import main
+        print("Starting Sliding Puzzle Solver...")
+        print("Close the window to exit.")
+        main()
@@ -1,134 +1,815 @@
+import heapq
+import itertools
+import random
+import sys
+import threading
 import time
-from puzzle import Puzzle, SlideDirection
+from array import array
+from collections import deque
+from puzzle import Puzzle, PackedBoard, SlideDirection, OPPOSITE_DIRECTIONS
+from heuristics import SearchStopped, get_heuristic
 
-def solve_puzzle_bfs(puzzle, goal_puzzle):
+class SearchNode:
+    """Lightweight search tree node: packed state, g, h, parent node index and last move"""
+    __slots__ = ('state', 'g', 'h', 'parent', 'move')
+    
+    def __init__(self, state, g=0, h=0, parent=-1, move=SlideDirection.INITIAL):
+        self.state = state
+        self.g = g
+        self.h = h
+        self.parent = parent
+        self.move = move
+
+class SearchControl:
+    """Cancellation token, optional wall-clock and node budgets and progress reporting for one solve.
+    
+    Solvers poll stop_reason() every CHECK_INTERVAL expansions, so a stop lands
+    promptly without slowing the search. When stopped they return their closest
+    state so far as a partial result. At the same points they call report() when
+    progress_due(), which hands progress(dict) at most one snapshot per
+    progress_interval_ms.
+    """
+    
+    # Power of two, solvers test nodes_expanded & (CHECK_INTERVAL - 1)
+    CHECK_INTERVAL = 1024
+    
+    def __init__(self, cancel_event=None, time_limit_ms=None, node_limit=None,
+                 progress=None, progress_interval_ms=250):
+        self.cancel_event = cancel_event or threading.Event()
+        self.time_limit_ms = time_limit_ms
+        self.node_limit = node_limit
+        self.progress = progress
+        self.progress_interval_ms = progress_interval_ms
+        self.deadline = None
+        self.start_time = self.last_report = time.time()
+    
+    def start(self):
+        """Start the wall-clock budget and progress clock, solvers call this on entry"""
+        self.start_time = self.last_report = time.time()
+        if self.time_limit_ms is not None:
+            self.deadline = self.start_time + self.time_limit_ms / 1000
+    
+    def cancel(self):
+        self.cancel_event.set()
+    
+    def stop_reason(self, nodes_expanded):
+        """'cancelled', 'time_limit' or 'node_limit' once the search must stop, else None"""
+        if self.cancel_event.is_set():
+            return 'cancelled'
+        if self.node_limit is not None and nodes_expanded >= self.node_limit:
+            return 'node_limit'
+        if self.deadline is not None and time.time() >= self.deadline:
+            return 'time_limit'
+        return None
+    
+    def progress_due(self):
+        """True when a progress callback is set and the last report is old enough"""
+        return (self.progress is not None
+                and (time.time() - self.last_report) * 1000 >= self.progress_interval_ms)
+    
+    def report(self, nodes_expanded, frontier, bound, memory_bytes, **extra):
+        """Send a progress snapshot, bound is the f-bound, depth or h the solver is working at.
+        
+        Anytime solvers add best_moves and best_bound, their best solution so far.
+        """
+        self.last_report = time.time()
+        elapsed_s = max(self.last_report - self.start_time, 1e-9)
+        self.progress({
+            'nodes_expanded': nodes_expanded,
+            'frontier': frontier,
+            'bound': bound,
+            'nodes_per_sec': nodes_expanded / elapsed_s,
+            'memory_bytes': memory_bytes,
+            'elapsed_ms': elapsed_s * 1000,
+            **extra
+        })
+
+def format_progress(progress):
+    """One-line summary of a progress snapshot, for status bars and logs"""
+    line = (f"{progress['nodes_expanded']:,} nodes, frontier {progress['frontier']:,}, "
+            f"bound {progress['bound']}, {progress['nodes_per_sec']:,.0f} nodes/s, "
+            f"{progress['memory_bytes'] / (1024 * 1024):.1f}MB")
+    if progress.get('best_moves') is not None:
+        line += f", best {progress['best_moves']} moves (<= {progress['best_bound']:.2f}x optimal)"
+    return line
+
+def solve_puzzle_bfs(puzzle, goal_puzzle, control=None):
     """Breadth First Search - explores all states level by level"""
     start_time = time.time()
     
-    open_list = [puzzle]
-    closed_set = {puzzle.to_string()}
-    goal_mapping = Puzzle.get_matrix_mapping(goal_puzzle.matrix)
+    board = PackedBoard(puzzle.rows, puzzle.cols)
+    start_state = board.pack(puzzle.matrix)
+    goal_state = board.pack(goal_puzzle.matrix)
     
-    while open_list:
-        cur_puzzle = open_list.pop(0)
-        
-        if goal_puzzle.is_equal_to_puzzle(cur_puzzle):
-            return {
-                'solution_puzzle': cur_puzzle,
-                'runtime_ms': (time.time() - start_time) * 1000,
-                'max_puzzles_in_memory': len(closed_set) + len(open_list)
-            }
-        
-        for neighbor in cur_puzzle.generate_neighbors(goal_mapping):
-            neighbor_str = neighbor.to_string()
-            if neighbor_str not in closed_set:
-                closed_set.add(neighbor_str)
-                neighbor.came_from = cur_puzzle
-                open_list.append(neighbor)
-    
-    return {
-        'solution_puzzle': None,
-        'runtime_ms': (time.time() - start_time) * 1000,
-        'max_puzzles_in_memory': len(closed_set)
-    }
+    control = control or SearchControl()
+    control.start()
+    check_mask = control.CHECK_INTERVAL - 1
+    
+    # States get IDs in discovery order, so every layer is a contiguous ID range
+    states = [start_state]
+    parents = array('i', [-1])
+    moves = bytearray([SlideDirection.INITIAL])
+    closed_set = board.visited_set()
+    closed_set.add(start_state)
+    layer_stats = []
+    solution_id = 0 if start_state == goal_state else None
+    stop_reason = None
+    layer_start, layer_end = 0, 1
+    
+    # Hot loop locals, PackedBoard.slide is inlined below
+    slides, blank_shift = board.slides, board.blank_shift
+    tile_bits, tile_mask, tiles_mask = board.tile_bits, board.tile_mask, board.tiles_mask
+    
+    while solution_id is None and stop_reason is None and layer_start < layer_end:
+        last_layer_start = layer_start
+        for cur_id in range(layer_start, layer_end):
+            if not cur_id & check_mask:
+                stop_reason = control.stop_reason(cur_id)
+                if stop_reason:
+                    layer_start = cur_id
+                    break
+                if control.progress_due():
+                    control.report(cur_id, len(states) - cur_id, len(layer_stats) + 1,
+                                   bfs_memory_estimate(states, parents, moves, closed_set))
+            cur_state = states[cur_id]
+            blank = cur_state >> blank_shift
+            cleared_state = cur_state & tiles_mask
+            for direction, target in slides[blank]:
+                tile = (cur_state >> (target * tile_bits)) & tile_mask
+                neighbor_state = (cleared_state ^ (tile << (target * tile_bits)) ^ (tile << (blank * tile_bits))
+                                  | (target << blank_shift))
+                if neighbor_state in closed_set:
+                    continue
+                closed_set.add(neighbor_state)
+                states.append(neighbor_state)
+                parents.append(cur_id)
+                moves.append(direction)
+                if neighbor_state == goal_state:
+                    solution_id = len(states) - 1
+        
+        if stop_reason:
+            break
+        layer_start, layer_end = layer_end, len(states)
+        layer_stats.append({
+            'depth': len(layer_stats) + 1,
+            'frontier': layer_end - layer_start,
+            'states': len(states),
+            'memory_bytes': bfs_memory_estimate(states, parents, moves, closed_set)
+        })
+    
+    def moves_to(state_id):
+        path = []
+        while parents[state_id] != -1:
+            path.append(DIRECTION_NAMES[moves[state_id]])
+            state_id = parents[state_id]
+        path.reverse()
+        return path
+    
+    closest_id, closest_h = None, None
+    if stop_reason:
+        # Only scored once stopped: the closest state among the last layer and the one it was growing
+        goal_mapping = Puzzle.get_matrix_mapping(goal_puzzle.matrix)
+        closest_h, closest_id = min((board.manhattan_sum(states[state_id], goal_mapping), state_id)
+                                    for state_id in range(last_layer_start, len(states)))
+    
+    result = search_result(
+        start_time,
+        Puzzle.from_matrix(goal_puzzle.matrix) if solution_id is not None else None,
+        moves_to(solution_id) if solution_id is not None else [],
+        len(states),
+        # Every state before the last layer has been expanded
+        layer_start,
+        stop_reason,
+        Puzzle.from_packed(states[closest_id], board) if stop_reason else None,
+        moves_to(closest_id) if stop_reason else None,
+        closest_h
+    )
+    result['layer_stats'] = layer_stats
+    return result
+
+def search_memory_estimate(nodes, open_list, *tables):
+    """Approximate bytes held by a node list, its heap open list and any visited tables"""
+    node_size = sys.getsizeof(nodes[-1]) + sys.getsizeof(nodes[-1].state) if nodes else 0
+    entry_size = sys.getsizeof(open_list[0]) if open_list else 0
+    return (sys.getsizeof(nodes) + len(nodes) * node_size + sys.getsizeof(open_list)
+            + len(open_list) * entry_size + sum(sys.getsizeof(table) for table in tables))
+
+def bidirectional_memory_estimate(forward, backward):
+    """Approximate bytes held by both parent maps, keys plus (state, move) tuples"""
+    entry_size = sys.getsizeof(next(iter(forward))) + sys.getsizeof((0, 0))
+    return (sys.getsizeof(forward) + sys.getsizeof(backward)
+            + (len(forward) + len(backward)) * entry_size)
+
+def bfs_memory_estimate(states, parents, moves, closed_set):
+    """Approximate bytes held by the BFS state table, parent arrays and visited set"""
+    state_size = sys.getsizeof(states[-1]) if states else 0
+    return (sys.getsizeof(states) + len(states) * state_size + sys.getsizeof(closed_set)
+            + parents.itemsize * len(parents) + len(moves))
+
+def solve_puzzle_bidirectional_bfs(puzzle, goal_puzzle, control=None):
+    """Bidirectional BFS - grows one layer at a time from whichever side is smaller"""
+    start_time = time.time()
+    
+    board = PackedBoard(puzzle.rows, puzzle.cols)
+    start_state = board.pack(puzzle.matrix)
+    goal_state = board.pack(goal_puzzle.matrix)
+    control = control or SearchControl()
+    control.start()
+    check_mask = control.CHECK_INTERVAL - 1
+    stop_reason = None
+    
+    # Forward maps state to (parent, slide into it), backward to (child, slide out of it)
+    forward = {start_state: None}
+    backward = {goal_state: None}
+    forward_layer = [start_state]
+    backward_layer = [goal_state]
+    forward_depth = backward_depth = 0
+    nodes_expanded = 0
+    meeting_state = start_state if start_state == goal_state else None
+    
+    while meeting_state is None and stop_reason is None and forward_layer and backward_layer:
+        expand_forward = len(forward_layer) <= len(backward_layer)
+        if expand_forward:
+            layer, visited, other_visited = forward_layer, forward, backward
+        else:
+            layer, visited, other_visited = backward_layer, backward, forward
+        
+        next_layer = []
+        for cur_state in layer:
+            if not nodes_expanded & check_mask:
+                stop_reason = control.stop_reason(nodes_expanded)
+                if stop_reason:
+                    break
+                if control.progress_due():
+                    control.report(nodes_expanded, len(forward_layer) + len(backward_layer) + len(next_layer),
+                                   forward_depth + backward_depth + 1,
+                                   bidirectional_memory_estimate(forward, backward))
+            nodes_expanded += 1
+            for direction, target in board.slides[board.blank_index(cur_state)]:
+                neighbor_state = board.slide(cur_state, target)
+                if neighbor_state in visited:
+                    continue
+                # Backward edges are stored as the forward slide back towards the goal
+                visited[neighbor_state] = (cur_state, direction if expand_forward
+                                           else OPPOSITE_DIRECTIONS[direction])
+                # Layers are complete on both sides, so the first meeting is a shortest path
+                if neighbor_state in other_visited:
+                    meeting_state = neighbor_state
+                    break
+                next_layer.append(neighbor_state)
+            if meeting_state is not None:
+                break
+        
+        if stop_reason:
+            break
+        if expand_forward:
+            forward_layer = next_layer
+            forward_depth += 1
+        else:
+            backward_layer = next_layer
+            backward_depth += 1
+    
+    def forward_moves_to(state):
+        path = []
+        step = forward[state]
+        while step is not None:
+            path.append(DIRECTION_NAMES[step[1]])
+            step = forward[step[0]]
+        path.reverse()
+        return path
+    
+    moves = []
+    if meeting_state is not None:
+        moves = forward_moves_to(meeting_state)
+        step = backward[meeting_state]
+        while step is not None:
+            moves.append(DIRECTION_NAMES[step[1]])
+            step = backward[step[0]]
+    
+    closest_state, closest_h = None, None
+    if stop_reason:
+        # Only the forward side has paths from the start, its frontier is the furthest it got
+        goal_mapping = Puzzle.get_matrix_mapping(goal_puzzle.matrix)
+        closest_h, closest_state = min((board.manhattan_sum(state, goal_mapping), state)
+                                       for state in forward_layer)
+    
+    return search_result(
+        start_time,
+        Puzzle.from_matrix(goal_puzzle.matrix) if meeting_state is not None else None,
+        moves,
+        len(forward) + len(backward),
+        nodes_expanded,
+        stop_reason,
+        Puzzle.from_packed(closest_state, board) if stop_reason else None,
+        forward_moves_to(closest_state) if stop_reason else None,
+        closest_h
+    )
+
+# Insertion counter so equal-priority entries pop in FIFO order
+_enqueue_order = itertools.count()
 
-def priority_enqueue(open_list, puzzle, cost):
-    """Make open list a priority queue by inserting elements in order"""
-    for i in range(len(open_list)):
-        if open_list[i]['cost'] > cost:
-            open_list.insert(i, {'puzzle': puzzle, 'cost': cost})
-            return
-    # Puzzle cost is greater than all others, add to end
-    open_list.append({'puzzle': puzzle, 'cost': cost})
-
-def solve_puzzle_astar(puzzle, goal_puzzle):
-    """A* algorithm - uses both cost from start (g) and heuristic (h)"""
+def priority_enqueue(open_list, item, cost, tie_break=0):
+    """Push item onto the binary-heap open list, ties broken by tie_break then insertion order"""
+    heapq.heappush(open_list, (cost, tie_break, next(_enqueue_order), item))
+
+def priority_dequeue(open_list):
+    """Pop the lowest cost item from the open list"""
+    return heapq.heappop(open_list)[-1]
+
+def solve_puzzle_astar(puzzle, goal_puzzle, heuristic="Manhattan", control=None, weight=1):
+    """A* algorithm - uses both cost from start (g) and heuristic (h).
+    
+    weight above 1 orders the open list by g + weight * h (weighted A*), which
+    finds solutions at most weight times the optimal length with far fewer
+    expansions. The result's 'bound' is that suboptimality bound.
+    """
     start_time = time.time()
+    control = control or SearchControl()
+    control.start()
+    check_mask = control.CHECK_INTERVAL - 1
     
-    goal_mapping = Puzzle.get_matrix_mapping(goal_puzzle.matrix)
-    puzzle.update_manhattan_sum(goal_mapping)
+    board = PackedBoard(puzzle.rows, puzzle.cols)
+    start_state = board.pack(puzzle.matrix)
+    goal_state = board.pack(goal_puzzle.matrix)
+    try:
+        heuristic = get_heuristic(heuristic, goal_puzzle, control)
+    except SearchStopped as stop:
+        return stopped_before_search(start_time, puzzle, stop.reason)
+    start_h = heuristic.evaluate(board.to_tiles(start_state))
     
+    nodes = [SearchNode(start_state, 0, start_h)]
     open_list = []
-    priority_enqueue(open_list, puzzle, puzzle.manhattan_sum)
-    closed_set = set()
+    priority_enqueue(open_list, 0, weight * start_h, start_h)
+    # Index of the cheapest known node per open state
+    best_node = {start_state: 0}
+    # With a consistent heuristic expanded states are never reached more cheaply, so they are
+    # never reopened, and weighted A* keeps its bound without the re-expansions. Otherwise the
+    # closed set maps states to the g they were expanded at and a cheaper path reopens them.
+    reopen = not heuristic.consistent
+    closed_set = {} if reopen else board.visited_set()
+    nodes_expanded = 0
+    closest_index = 0
     
     while open_list:
-        cur_puzzle = open_list.pop(0)['puzzle']
-        
-        if goal_puzzle.is_equal_to_puzzle(cur_puzzle):
-            return {
-                'solution_puzzle': cur_puzzle,
-                'runtime_ms': (time.time() - start_time) * 1000,
-                'max_puzzles_in_memory': len(closed_set) + len(open_list)
-            }
+        cur_index = priority_dequeue(open_list)
+        cur_node = nodes[cur_index]
         
-        cur_str = cur_puzzle.to_string()
-        if cur_str in closed_set:
+        # A cheaper path to this state was queued after this entry, or it is closed (lazy deletion)
+        if best_node.get(cur_node.state) != cur_index:
             continue
-        closed_set.add(cur_str)
         
-        cost_to_neighbor = cur_puzzle.cost_from_start + 1
+        if cur_node.state == goal_state:
+            result = build_result(board, nodes, cur_index, start_time,
+                                  len(best_node) + len(closed_set), nodes_expanded)
+            result['bound'] = weight
+            return result
+        
+        if not nodes_expanded & check_mask:
+            stop_reason = control.stop_reason(nodes_expanded)
+            if stop_reason:
+                return build_result(board, nodes, None, start_time, len(best_node) + len(closed_set),
+                                    nodes_expanded, stop_reason, closest_index)
+            if control.progress_due():
+                control.report(nodes_expanded, len(best_node), cur_node.g + weight * cur_node.h,
+                               search_memory_estimate(nodes, open_list, best_node, closed_set))
+        
+        del best_node[cur_node.state]
+        if reopen:
+            closed_set[cur_node.state] = cur_node.g
+        else:
+            closed_set.add(cur_node.state)
+        nodes_expanded += 1
+        cost_to_neighbor = cur_node.g + 1
         
-        for neighbor in cur_puzzle.generate_neighbors(goal_mapping):
-            neighbor_str = neighbor.to_string()
-            if neighbor_str in closed_set:
+        cur_blank = board.blank_index(cur_node.state)
+        for direction, target in board.slides[cur_blank]:
+            neighbor_state = board.slide(cur_node.state, target)
+            if neighbor_state in closed_set:
+                if not reopen or closed_set[neighbor_state] <= cost_to_neighbor:
+                    continue
+                del closed_set[neighbor_state]
+            known_index = best_node.get(neighbor_state)
+            if known_index is not None and nodes[known_index].g <= cost_to_neighbor:
                 continue
+            # The slid tile moves from target into the blank's cell
+            neighbor_h = heuristic.update(cur_node.h,
+                                          board.to_tiles(neighbor_state) if heuristic.needs_tiles else None,
+                                          board.tile_at(cur_node.state, target), target, cur_blank)
+            nodes.append(SearchNode(neighbor_state, cost_to_neighbor, neighbor_h, cur_index, direction))
+            best_node[neighbor_state] = len(nodes) - 1
+            if neighbor_h < nodes[closest_index].h:
+                closest_index = len(nodes) - 1
+            # Prefer deeper nodes (lower h) among equal f
+            priority_enqueue(open_list, len(nodes) - 1, cost_to_neighbor + weight * neighbor_h, neighbor_h)
+    
+    return build_result(board, nodes, None, start_time, len(best_node) + len(closed_set), nodes_expanded)
+
+def solve_puzzle_weighted_astar(puzzle, goal_puzzle, heuristic="Manhattan", control=None, weight=2.0):
+    """Weighted A* - A* on g + weight * h, solutions at most weight times optimal"""
+    return solve_puzzle_astar(puzzle, goal_puzzle, heuristic, control, weight)
+
+def solve_puzzle_arastar(puzzle, goal_puzzle, heuristic="Manhattan", control=None, weight=2.5, weight_step=0.5):
+    """Anytime Repairing A* - weighted A* passes with a falling weight, each repairing the last.
+    
+    The first pass finds a solution within weight of optimal quickly, each later
+    pass lowers the weight by weight_step and reuses the earlier search instead of
+    restarting. Every improved solution is reported through control's progress as
+    best_moves and best_bound, its proven suboptimality bound. The search ends
+    with the optimum (bound 1), or when control stops it with the best solution so
+    far, marked 'stopped' with the stop reason.
+    """
+    start_time = time.time()
+    control = control or SearchControl()
+    control.start()
+    check_mask = control.CHECK_INTERVAL - 1
+    
+    board = PackedBoard(puzzle.rows, puzzle.cols)
+    start_state = board.pack(puzzle.matrix)
+    goal_state = board.pack(goal_puzzle.matrix)
+    try:
+        heuristic = get_heuristic(heuristic, goal_puzzle, control)
+    except SearchStopped as stop:
+        return stopped_before_search(start_time, puzzle, stop.reason)
+    start_h = heuristic.evaluate(board.to_tiles(start_state))
+    
+    nodes = [SearchNode(start_state, 0, start_h)]
+    open_list = []
+    priority_enqueue(open_list, 0, weight * start_h, start_h)
+    # Index of the cheapest known node per reached state, kept across passes
+    best_node = {start_state: 0}
+    open_states = {start_state}
+    # Expanded this pass, and improved after that (re-queued once the pass ends)
+    closed_set = set()
+    inconsistent = set()
+    nodes_expanded = 0
+    closest_index = 0
+    best = None
+    
+    while True:
+        # One weighted pass: expand until nothing open could beat the goal's cost
+        while open_list:
+            cur_index = open_list[0][-1]
+            cur_node = nodes[cur_index]
+            if best_node[cur_node.state] != cur_index or cur_node.state not in open_states:
+                priority_dequeue(open_list)
+                continue
+            if goal_state in best_node and nodes[best_node[goal_state]].g <= open_list[0][0]:
+                break
+            priority_dequeue(open_list)
             
-            # Check if already in open list with higher cost
-            for idx, item in enumerate(open_list):
-                if item['puzzle'].is_equal_to_puzzle(neighbor):
-                    if item['puzzle'].cost_from_start > cost_to_neighbor:
-                        open_list.pop(idx)
-                    else:
-                        break
-            else:
-                neighbor.came_from = cur_puzzle
-                neighbor.cost_from_start = cost_to_neighbor
-                priority_enqueue(open_list, neighbor, neighbor.manhattan_sum + neighbor.cost_from_start)
-    
-    return {
-        'solution_puzzle': None,
-        'runtime_ms': (time.time() - start_time) * 1000,
-        'max_puzzles_in_memory': len(closed_set)
-    }
+            if not nodes_expanded & check_mask:
+                stop_reason = control.stop_reason(nodes_expanded)
+                if stop_reason:
+                    if best is None:
+                        return build_result(board, nodes, None, start_time, len(best_node), nodes_expanded,
+                                            stop_reason, closest_index)
+                    best['stopped'] = stop_reason
+                    best['runtime_ms'] = (time.time() - start_time) * 1000
+                    return best
+                if control.progress_due():
+                    control.report(nodes_expanded, len(open_states), weight,
+                                   search_memory_estimate(nodes, open_list, best_node, closed_set))
+            
+            open_states.remove(cur_node.state)
+            closed_set.add(cur_node.state)
+            nodes_expanded += 1
+            cost_to_neighbor = cur_node.g + 1
+            
+            cur_blank = board.blank_index(cur_node.state)
+            for direction, target in board.slides[cur_blank]:
+                neighbor_state = board.slide(cur_node.state, target)
+                known_index = best_node.get(neighbor_state)
+                if known_index is not None and nodes[known_index].g <= cost_to_neighbor:
+                    continue
+                neighbor_h = heuristic.update(cur_node.h,
+                                              board.to_tiles(neighbor_state) if heuristic.needs_tiles else None,
+                                              board.tile_at(cur_node.state, target), target, cur_blank)
+                nodes.append(SearchNode(neighbor_state, cost_to_neighbor, neighbor_h, cur_index, direction))
+                best_node[neighbor_state] = len(nodes) - 1
+                if neighbor_h < nodes[closest_index].h:
+                    closest_index = len(nodes) - 1
+                if neighbor_state in closed_set:
+                    inconsistent.add(neighbor_state)
+                else:
+                    open_states.add(neighbor_state)
+                    priority_enqueue(open_list, len(nodes) - 1, cost_to_neighbor + weight * neighbor_h, neighbor_h)
+        
+        if goal_state not in best_node:
+            return build_result(board, nodes, None, start_time, len(best_node), nodes_expanded)
+        
+        # No state left to expand has f below the lowest open g + h, so that bounds the optimum
+        goal_cost = nodes[best_node[goal_state]].g
+        lowest_f = min((nodes[best_node[state]].g + nodes[best_node[state]].h
+                        for state in itertools.chain(open_states, inconsistent)), default=goal_cost)
+        bound = goal_cost / lowest_f if lowest_f else 1
+        # A pass without reopens is within weight of optimal only if the heuristic is consistent
+        if heuristic.consistent:
+            bound = min(weight, bound)
+        bound = max(1, bound)
+        if best is None or goal_cost < len(best['solution_moves']) or bound < best['bound']:
+            best = build_result(board, nodes, best_node[goal_state], start_time, len(best_node), nodes_expanded)
+            best['bound'] = bound
+            if control.progress is not None:
+                control.report(nodes_expanded, len(open_states), weight,
+                               search_memory_estimate(nodes, open_list, best_node, closed_set),
+                               best_moves=goal_cost, best_bound=bound)
+        if bound <= 1:
+            best['runtime_ms'] = (time.time() - start_time) * 1000
+            return best
+        
+        # Next pass: lower weight, improved closed states rejoin the open list
+        weight = max(1, weight - weight_step)
+        open_states |= inconsistent
+        inconsistent.clear()
+        closed_set.clear()
+        open_list = []
+        for state in open_states:
+            node = nodes[best_node[state]]
+            priority_enqueue(open_list, best_node[state], node.g + weight * node.h, node.h)
 
 
-def solve_puzzle_gbfs(puzzle, goal_puzzle):
+def solve_puzzle_gbfs(puzzle, goal_puzzle, heuristic="Manhattan", control=None):
     """Greedy Best-First Search - uses only heuristic (h), ignores cost"""
     start_time = time.time()
+    control = control or SearchControl()
+    control.start()
+    check_mask = control.CHECK_INTERVAL - 1
     
-    goal_mapping = Puzzle.get_matrix_mapping(goal_puzzle.matrix)
-    puzzle.update_manhattan_sum(goal_mapping)
+    board = PackedBoard(puzzle.rows, puzzle.cols)
+    start_state = board.pack(puzzle.matrix)
+    goal_state = board.pack(goal_puzzle.matrix)
+    try:
+        heuristic = get_heuristic(heuristic, goal_puzzle, control)
+    except SearchStopped as stop:
+        return stopped_before_search(start_time, puzzle, stop.reason)
     
+    start_h = heuristic.evaluate(board.to_tiles(start_state))
+    nodes = [SearchNode(start_state, 0, start_h)]
     open_list = []
-    priority_enqueue(open_list, puzzle, puzzle.manhattan_sum)
-    closed_set = set()
+    priority_enqueue(open_list, 0, start_h)
+    # States ever queued, each is queued at most once
+    closed_set = board.visited_set()
+    closed_set.add(start_state)
+    nodes_expanded = 0
+    closest_index = 0
     
     while open_list:
-        cur_puzzle = open_list.pop(0)['puzzle']
+        cur_index = priority_dequeue(open_list)
+        cur_node = nodes[cur_index]
         
-        if goal_puzzle.is_equal_to_puzzle(cur_puzzle):
-            return {
-                'solution_puzzle': cur_puzzle,
-                'runtime_ms': (time.time() - start_time) * 1000,
-                'max_puzzles_in_memory': len(closed_set) + len(open_list)
-            }
+        if cur_node.state == goal_state:
+            return build_result(board, nodes, cur_index, start_time, len(closed_set), nodes_expanded)
         
-        cur_str = cur_puzzle.to_string()
-        if cur_str in closed_set:
-            continue
-        closed_set.add(cur_str)
+        if not nodes_expanded & check_mask:
+            stop_reason = control.stop_reason(nodes_expanded)
+            if stop_reason:
+                return build_result(board, nodes, None, start_time, len(closed_set), nodes_expanded,
+                                    stop_reason, closest_index)
+            if control.progress_due():
+                control.report(nodes_expanded, len(open_list), cur_node.h,
+                               search_memory_estimate(nodes, open_list, closed_set))
         
-        for neighbor in cur_puzzle.generate_neighbors(goal_mapping):
-            if neighbor.to_string() not in closed_set:
-                neighbor.came_from = cur_puzzle
-                priority_enqueue(open_list, neighbor, neighbor.manhattan_sum)
+        if cur_node.h < nodes[closest_index].h:
+            closest_index = cur_index
+        nodes_expanded += 1
+        cur_blank = board.blank_index(cur_node.state)
+        for direction, target in board.slides[cur_blank]:
+            neighbor_state = board.slide(cur_node.state, target)
+            if neighbor_state not in closed_set:
+                closed_set.add(neighbor_state)
+                neighbor_h = heuristic.update(cur_node.h,
+                                              board.to_tiles(neighbor_state) if heuristic.needs_tiles else None,
+                                              board.tile_at(cur_node.state, target), target, cur_blank)
+                nodes.append(SearchNode(neighbor_state, cur_node.g + 1, neighbor_h, cur_index, direction))
+                # Prefer shallower nodes among equal h
+                priority_enqueue(open_list, len(nodes) - 1, neighbor_h, cur_node.g + 1)
     
-    return {
-        'solution_puzzle': None,
-        'runtime_ms': (time.time() - start_time) * 1000,
-        'max_puzzles_in_memory': len(closed_set)
-    }
+    return build_result(board, nodes, None, start_time, len(closed_set), nodes_expanded)
+
+def solve_puzzle_idastar(puzzle, goal_puzzle, heuristic="Manhattan", control=None):
+    """Iterative Deepening A* - optimal like A*, memory grows only with solution depth"""
+    start_time = time.time()
+    control = control or SearchControl()
+    control.start()
+    check_mask = control.CHECK_INTERVAL - 1
+    
+    board = PackedBoard(puzzle.rows, puzzle.cols)
+    try:
+        heuristic = get_heuristic(heuristic, goal_puzzle, control)
+    except SearchStopped as stop:
+        return stopped_before_search(start_time, puzzle, stop.reason)
+    update_h = heuristic.update
+    slides = board.slides
+    
+    # Single mutable board, children are made and unmade in place
+    tiles = [val for row in puzzle.matrix for val in row]
+    goal_tiles = [val for row in goal_puzzle.matrix for val in row]
+    path = []
+    nodes_expanded = 0
+    found = -1
+    stopped = -2
+    stop_reason = None
+    start_blank = tiles.index(0)
+    start_h = heuristic.evaluate(tiles)
+    closest_h, closest_path = start_h, []
+    
+    def search(blank, cost, h, bound, last_direction):
+        nonlocal nodes_expanded, stop_reason, closest_h, closest_path
+        if cost + h > bound:
+            return cost + h
+        if h == 0 and tiles == goal_tiles:
+            return found
+        if h < closest_h:
+            closest_h, closest_path = h, path[:]
+        if not nodes_expanded & check_mask:
+            stop_reason = control.stop_reason(nodes_expanded)
+            if stop_reason:
+                return stopped
+            if control.progress_due():
+                control.report(nodes_expanded, len(path), bound,
+                               sys.getsizeof(path) + sys.getsizeof(tiles) + sys.getsizeof(closest_path))
+        
+        nodes_expanded += 1
+        next_bound = float('inf')
+        skip_direction = OPPOSITE_DIRECTIONS[last_direction]
+        
+        for direction, target in slides[blank]:
+            # Never undo the previous slide
+            if direction == skip_direction:
+                continue
+            tile = tiles[target]
+            tiles[blank] = tile
+            tiles[target] = 0
+            path.append(direction)
+            
+            result = search(target, cost + 1, update_h(h, tiles, tile, target, blank), bound, direction)
+            if result == found or result == stopped:
+                return result
+            
+            path.pop()
+            tiles[target] = tile
+            tiles[blank] = 0
+            next_bound = min(next_bound, result)
+        
+        return next_bound
+    
+    bound = start_h
+    while True:
+        result = search(start_blank, 0, start_h, bound, SlideDirection.INITIAL)
+        if result in (found, stopped) or result == float('inf'):
+            break
+        bound = result
+    
+    closest_puzzle = None
+    if stop_reason:
+        closest_puzzle = Puzzle.from_matrix(puzzle.matrix)
+        for direction in closest_path:
+            slide_puzzle(closest_puzzle, direction)
+    
+    return search_result(
+        start_time,
+        Puzzle.from_matrix(goal_puzzle.matrix) if result == found else None,
+        [DIRECTION_NAMES[direction] for direction in path] if result == found else [],
+        # Only the current path is kept, at most bound + 1 states deep
+        bound + 1,
+        nodes_expanded,
+        stop_reason,
+        closest_puzzle,
+        [DIRECTION_NAMES[direction] for direction in closest_path],
+        closest_h
+    )
+
+def beam_memory_estimate(seen, candidates, parents, moves):
+    """Approximate bytes held by the beam's dedupe window, one layer's candidates and the path arrays"""
+    state_size = sys.getsizeof(next(iter(seen))) if seen else 0
+    # Window states sit in the seen dict and the recent layer lists, candidates carry an (h, index, move) tuple
+    entry_size = state_size + sys.getsizeof((0, 0, 0))
+    return (sys.getsizeof(seen) + len(seen) * (state_size + 8) + sys.getsizeof(candidates)
+            + len(candidates) * entry_size
+            + sum(layer.itemsize * len(layer) + len(layer_moves) for layer, layer_moves in zip(parents, moves)))
+
+def solve_puzzle_beam(puzzle, goal_puzzle, heuristic="Manhattan", control=None, beam_width=1000, window=4,
+                      max_depth=None):
+    """Beam search - expands whole layers but keeps only the beam_width lowest h states, non-optimal.
+    
+    Duplicates are only dropped against the last window layers, so memory is about
+    beam_width * window states plus a parent index and move per kept state for the
+    path, whatever the board size. A beam that dies out or passes max_depth
+    (default 50 moves per cell) stops as 'beam_exhausted' with its closest state.
+    The result adds 'peak_memory_bytes'.
+    """
+    start_time = time.time()
+    control = control or SearchControl()
+    control.start()
+    
+    board = PackedBoard(puzzle.rows, puzzle.cols)
+    start_state = board.pack(puzzle.matrix)
+    goal_state = board.pack(goal_puzzle.matrix)
+    try:
+        heuristic = get_heuristic(heuristic, goal_puzzle, control)
+    except SearchStopped as stop:
+        return stopped_before_search(start_time, puzzle, stop.reason)
+    max_depth = max_depth or 50 * board.size
+    
+    # The current layer as (h, state), parents/moves hold each kept layer's links to the one before
+    layer = [(heuristic.evaluate(board.to_tiles(start_state)), start_state)]
+    parents = []
+    moves = []
+    # Layer number each recent state was last kept in, the deque says which layers to forget
+    seen = {start_state: 0}
+    recent = deque([[start_state]])
+    nodes_expanded = 0
+    max_states = peak_memory = 0
+    # (h, depth, position, state) of the lowest h state kept so far
+    closest = (layer[0][0], 0, 0, start_state)
+    goal_link = 0 if start_state == goal_state else None
+    stop_reason = None
+    
+    while goal_link is None:
+        stop_reason = control.stop_reason(nodes_expanded)
+        if stop_reason is None and (not layer or len(parents) >= max_depth):
+            stop_reason = 'beam_exhausted'
+        if stop_reason:
+            break
+        
+        # Every child of the layer, first occurrence wins within the layer
+        candidates = {}
+        for index, (h, state) in enumerate(layer):
+            nodes_expanded += 1
+            blank = board.blank_index(state)
+            for direction, target in board.slides[blank]:
+                neighbor_state = board.slide(state, target)
+                if neighbor_state in candidates or neighbor_state in seen:
+                    continue
+                neighbor_h = heuristic.update(h, board.to_tiles(neighbor_state) if heuristic.needs_tiles else None,
+                                              board.tile_at(state, target), target, blank)
+                candidates[neighbor_state] = (neighbor_h, index, direction)
+        
+        kept = heapq.nsmallest(beam_width, candidates.items(), key=lambda item: item[1][0])
+        max_states = max(max_states, len(candidates) + len(seen))
+        peak_memory = max(peak_memory, beam_memory_estimate(seen, candidates, parents, moves))
+        parents.append(array('I', (index for _, (_, index, _) in kept)))
+        moves.append(bytes(direction for _, (_, _, direction) in kept))
+        layer = [(h, state) for state, (h, _, _) in kept]
+        
+        recent.append([state for _, state in layer])
+        for _, state in layer:
+            seen[state] = len(parents)
+        if len(recent) > window:
+            forgotten_layer = len(parents) - window
+            for state in recent.popleft():
+                # Kept again in a later layer, that visit is still recent
+                if seen.get(state) == forgotten_layer:
+                    del seen[state]
+        
+        for position, (h, state) in enumerate(layer):
+            if state == goal_state:
+                goal_link = position
+            if h < closest[0]:
+                closest = (h, len(parents), position, state)
+        if control.progress_due():
+            control.report(nodes_expanded, len(layer), len(parents), peak_memory)
+    
+    def moves_to(depth, position):
+        path = []
+        for layer_parents, layer_moves in zip(reversed(parents[:depth]), reversed(moves[:depth])):
+            path.append(DIRECTION_NAMES[layer_moves[position]])
+            position = layer_parents[position]
+        return path[::-1]
+    
+    if stop_reason:
+        closest_h, depth, position, closest_state = closest
+        result = search_result(start_time, None, [], max_states, nodes_expanded, stop_reason,
+                               Puzzle.from_packed(closest_state, board), moves_to(depth, position), closest_h)
+    else:
+        result = search_result(start_time, Puzzle.from_packed(goal_state, board),
+                               moves_to(len(parents), goal_link), max_states, nodes_expanded)
+    result['peak_memory_bytes'] = peak_memory
+    return result
+
+def generate_puzzle_at_optimal_distance(rows, cols, min_moves, max_moves=None, seed=None, goal_matrix=None,
+                                        heuristic="Linear Conflict", attempts=1000):
+    """Returns a random-walk board whose optimal solution length is in [min_moves, max_moves].
+    
+    Manhattan distance never exceeds the optimal length, so walks aim at distances
+    from two thirds of min_moves up to max_moves and IDA* keeps the first board
+    inside the band. Practical wherever IDA* is, so small boards or modest distances.
+    """
+    rng = random.Random(seed)
+    max_moves = min_moves if max_moves is None else max_moves
+    goal_matrix = goal_matrix or Puzzle(rows, cols, gen_random=False).matrix
+    goal_puzzle = Puzzle.from_matrix(goal_matrix)
+    
+    for _ in range(attempts):
+        try:
+            matrix = Puzzle.generate_random_walk_puzzle(rows, cols, max(1, min_moves * 2 // 3), max_moves,
+                                                        rng.randrange(2 ** 32), goal_matrix, min_steps=min_moves)
+        except ValueError:
+            continue
+        moves = solve_puzzle_idastar(Puzzle.from_matrix(matrix), goal_puzzle, heuristic)['solution_moves']
+        if min_moves <= len(moves) <= max_moves:
+            return matrix
+    raise ValueError(f"No board with an optimal length of {min_moves}-{max_moves} in {attempts} attempts")
 
 # Direction mapping for building solution moves
 DIRECTION_NAMES = {
@@ -139,18 +820,75 @@ DIRECTION_NAMES = {
     SlideDirection.RIGHT: "RIGHT"
 }
 
-def get_solution_moves(solution_puzzle):
-    """Build move list from puzzle state working backwards"""
-    if not solution_puzzle:
+# One letter per move keeps long GBFS solutions small on pipes and in the solution cache
+MOVE_CODES = {"UP": "U", "DOWN": "D", "LEFT": "L", "RIGHT": "R"}
+MOVE_NAMES = {code: name for name, code in MOVE_CODES.items()}
+
+def encode_moves(moves):
+    return "".join(MOVE_CODES[move] for move in moves).encode("ascii")
+
+def decode_moves(data):
+    return [MOVE_NAMES[code] for code in data.decode("ascii")]
+
+def get_solution_moves(nodes, solution_index):
+    """Build move list from a search node working backwards through parent indices"""
+    if solution_index is None:
         return []
     
     moves = []
-    current = solution_puzzle
+    current = nodes[solution_index]
     
-    while current and current.last_slide_direction != SlideDirection.INITIAL:
-        moves.append(DIRECTION_NAMES[current.last_slide_direction])
-        current = current.came_from
+    while current.parent != -1:
+        moves.append(DIRECTION_NAMES[current.move])
+        current = nodes[current.parent]
     
     moves.reverse()
     return moves
 
+def slide_puzzle(puzzle, direction):
+    """Apply one slide direction to a Puzzle in place"""
+    {SlideDirection.UP: puzzle.slide_up, SlideDirection.DOWN: puzzle.slide_down,
+     SlideDirection.LEFT: puzzle.slide_left, SlideDirection.RIGHT: puzzle.slide_right}[direction]()
+
+def search_result(start_time, solution_puzzle, solution_moves, max_puzzles_in_memory, nodes_expanded,
+                  stop_reason=None, partial_puzzle=None, partial_moves=None, partial_h=None):
+    """Build the solver result dict, status is 'solved', 'unsolvable' or the stop reason.
+    
+    A stopped search also reports the closest state it reached (lowest h) as
+    partial_puzzle, with partial_moves leading there from the start.
+    """
+    result = {
+        'solution_puzzle': solution_puzzle,
+        'solution_moves': solution_moves,
+        'runtime_ms': (time.time() - start_time) * 1000,
+        'max_puzzles_in_memory': max_puzzles_in_memory,
+        'nodes_expanded': nodes_expanded,
+        'status': stop_reason or ('solved' if solution_puzzle is not None else 'unsolvable')
+    }
+    if stop_reason:
+        result['partial_puzzle'] = partial_puzzle
+        result['partial_moves'] = partial_moves
+        result['partial_h'] = partial_h
+    return result
+
+def stopped_before_search(start_time, puzzle, stop_reason):
+    """Result for a solve stopped while its heuristic's tables were building, nothing was expanded"""
+    return search_result(start_time, None, [], 0, 0, stop_reason, Puzzle.from_matrix(puzzle.matrix), [], None)
+
+def build_result(board, nodes, solution_index, start_time, max_puzzles_in_memory, nodes_expanded,
+                 stop_reason=None, closest_index=None):
+    """Build the solver result dict for a search over SearchNodes"""
+    if solution_index is None:
+        solution_puzzle = None
+    else:
+        solution_puzzle = Puzzle.from_packed(nodes[solution_index].state, board)
+    
+    partial_puzzle = partial_moves = partial_h = None
+    if stop_reason:
+        partial_puzzle = Puzzle.from_packed(nodes[closest_index].state, board)
+        partial_moves = get_solution_moves(nodes, closest_index)
+        partial_h = nodes[closest_index].h
+    
+    return search_result(start_time, solution_puzzle, get_solution_moves(nodes, solution_index),
+                         max_puzzles_in_memory, nodes_expanded, stop_reason,
+                         partial_puzzle, partial_moves, partial_h)
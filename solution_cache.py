@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from puzzle import Puzzle
+from search_algorithms import search_result, encode_moves, decode_moves
+
+DEFAULT_CACHE_BYTES = 8 * 1024 * 1024
+
+# Rough per-entry cost of the key tuple, the OrderedDict slot and the stats dict
+ENTRY_OVERHEAD_BYTES = 400
+
+# Transposing the board turns vertical slides into horizontal ones
+TRANSPOSED_MOVES = {"UP": "LEFT", "LEFT": "UP", "DOWN": "RIGHT", "RIGHT": "DOWN"}
+
+# Solver stats kept with each solution
+CACHED_STATS = ('runtime_ms', 'nodes_expanded', 'max_puzzles_in_memory', 'engine', 'bound', 'original_length')
+
+def transpose_default(puzzle):
+    """Mirror a board across its main diagonal, relabelled so the default goal maps to the
+    default goal of the transposed size. Solutions map across with TRANSPOSED_MOVES."""
+    rows, cols = puzzle.rows, puzzle.cols
+    matrix = [[0] * rows for _ in range(cols)]
+    for row in range(rows):
+        for col in range(cols):
+            val = puzzle.matrix[row][col]
+            if val:
+                # The tile's goal cell (goal_row, goal_col) becomes (goal_col, goal_row)
+                goal_row, goal_col = divmod(val - 1, cols)
+                val = goal_col * rows + goal_row + 1
+            matrix[col][row] = val
+    return Puzzle.from_matrix(matrix)
+
+class SolutionCache:
+    """LRU cache of solved boards keyed by algorithm name and packed (start, goal).
+    
+    The size is bounded by an estimate of the entries' memory, max_bytes. With the
+    default goal a board and its transpose share one entry. Only solved results are
+    kept, budget-stopped searches are not. Given a path, load() and save() persist
+    the entries as JSON. Lookups and stores are safe from several threads.
+    """
+    
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, path=None):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.entries = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load()
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def key(self, algorithm_name, puzzle, goal_puzzle):
+        """Cache key and whether it was taken from the transposed board"""
+        start_bytes = puzzle.to_bytes()
+        goal_bytes = goal_puzzle.to_bytes()
+        if goal_bytes == Puzzle(puzzle.rows, puzzle.cols, gen_random=False).to_bytes():
+            transposed_bytes = transpose_default(puzzle).to_bytes()
+            if transposed_bytes < start_bytes:
+                transposed_goal = Puzzle(puzzle.cols, puzzle.rows, gen_random=False)
+                return (algorithm_name, transposed_bytes, transposed_goal.to_bytes()), True
+        return (algorithm_name, start_bytes, goal_bytes), False
+    
+    def get(self, algorithm_name, puzzle, goal_puzzle):
+        """Solver result for a cached board, None on a miss.
+        
+        A hit is marked 'cached', with the original solve's stats under 'cached_stats'.
+        """
+        start_time = time.time()
+        key, transposed = self.key(algorithm_name, puzzle, goal_puzzle)
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            moves_bytes, stats = self.entries[key]
+        
+        moves = decode_moves(moves_bytes)
+        if transposed:
+            moves = [TRANSPOSED_MOVES[move] for move in moves]
+        result = search_result(start_time, Puzzle.from_matrix(goal_puzzle.matrix), moves, 0, 0)
+        result['cached'] = True
+        result['cached_stats'] = stats
+        for name in ('engine', 'bound', 'original_length'):
+            if name in stats:
+                result[name] = stats[name]
+        return result
+    
+    def put(self, algorithm_name, puzzle, goal_puzzle, result):
+        """Store a solver result, evicting the least recently used entries over max_bytes"""
+        # An anytime search cut short could still improve, its answer is not the solver's last word
+        if result['status'] != 'solved' or result.get('stopped'):
+            return
+        key, transposed = self.key(algorithm_name, puzzle, goal_puzzle)
+        moves = result['solution_moves']
+        if transposed:
+            moves = [TRANSPOSED_MOVES[move] for move in moves]
+        stats = {name: result[name] for name in CACHED_STATS if result.get(name) is not None}
+        self.insert(key, encode_moves(moves), stats)
+    
+    def insert(self, key, moves_bytes, stats):
+        with self.lock:
+            if key in self.entries:
+                self.size_bytes -= self.entry_bytes(key, self.entries[key][0])
+            self.entries[key] = (moves_bytes, stats)
+            self.entries.move_to_end(key)
+            self.size_bytes += self.entry_bytes(key, moves_bytes)
+            while self.size_bytes > self.max_bytes and self.entries:
+                old_key, (old_moves, _) = self.entries.popitem(last=False)
+                self.size_bytes -= self.entry_bytes(old_key, old_moves)
+    
+    @staticmethod
+    def entry_bytes(key, moves_bytes):
+        return ENTRY_OVERHEAD_BYTES + len(key[0]) + len(key[1]) + len(key[2]) + len(moves_bytes)
+    
+    def solve(self, algorithm_name, algorithm, puzzle, goal_puzzle, control=None):
+        """Cached result if there is one, otherwise run algorithm and remember its result"""
+        result = self.get(algorithm_name, puzzle, goal_puzzle)
+        if result is None:
+            result = algorithm(puzzle, goal_puzzle, control=control)
+            self.put(algorithm_name, puzzle, goal_puzzle, result)
+        return result
+    
+    def load(self, path=None):
+        """Read saved entries, oldest first, so the usual LRU bound applies"""
+        with open(path or self.path) as file:
+            for algorithm_name, start_hex, goal_hex, moves, stats in json.load(file):
+                key = (algorithm_name, bytes.fromhex(start_hex), bytes.fromhex(goal_hex))
+                self.insert(key, moves.encode("ascii"), stats)
+    
+    def save(self, path=None):
+        """Write the entries in LRU order, replacing the file atomically"""
+        path = path or self.path
+        with self.lock:
+            entries = [[key[0], key[1].hex(), key[2].hex(), moves_bytes.decode("ascii"), stats]
+                       for key, (moves_bytes, stats) in self.entries.items()]
+        with open(path + ".tmp", "w") as file:
+            json.dump(entries, file)
+        os.replace(path + ".tmp", path)
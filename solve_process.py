@@ -0,0 +1,262 @@
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from functools import partial
+from multiprocessing.connection import wait
+from puzzle import Puzzle
+from search_algorithms import (
+    SearchControl,
+    search_result,
+    encode_moves,
+    decode_moves,
+    solve_puzzle_bidirectional_bfs,
+    solve_puzzle_astar,
+    solve_puzzle_gbfs,
+    solve_puzzle_idastar
+)
+from heuristics import WalkingDistanceHeuristic
+
+# Children are spawned rather than forked from the Tk process
+_context = multiprocessing.get_context("spawn")
+
+def encode_result(result):
+    """Solver result with its Puzzles and move lists turned into bytes"""
+    encoded = dict(result)
+    for key in ('solution_puzzle', 'partial_puzzle'):
+        if encoded.get(key) is not None:
+            encoded[key] = encoded[key].to_bytes()
+    for key in ('solution_moves', 'partial_moves'):
+        if encoded.get(key) is not None:
+            encoded[key] = encode_moves(encoded[key])
+    return encoded
+
+def decode_result(encoded):
+    """Inverse of encode_result"""
+    result = dict(encoded)
+    for key in ('solution_puzzle', 'partial_puzzle'):
+        if result.get(key) is not None:
+            result[key] = Puzzle.from_bytes(result[key])
+    for key in ('solution_moves', 'partial_moves'):
+        if result.get(key) is not None:
+            result[key] = decode_moves(result[key])
+    return result
+
+def solve_worker(algorithm, start_bytes, goal_bytes, time_limit_ms, node_limit, connection):
+    """Child process entry point, streams ('progress', snapshot) messages, then sends
+    ('result', encoded result) or ('error', message)"""
+    try:
+        control = SearchControl(time_limit_ms=time_limit_ms, node_limit=node_limit,
+                                progress=lambda progress: connection.send(('progress', progress)))
+        result = algorithm(Puzzle.from_bytes(start_bytes), Puzzle.from_bytes(goal_bytes), control=control)
+        connection.send(('result', encode_result(result)))
+    except Exception as e:
+        connection.send(('error', str(e)))
+    finally:
+        connection.close()
+
+class BackgroundSolve:
+    """A solve running off the UI thread: poll() until it is done, then read result().
+    
+    progress holds the latest SearchControl progress snapshot, None until the first one.
+    """
+    
+    def __init__(self):
+        self.start_time = time.time()
+        self.outcome = None
+        self.progress = None
+    
+    def poll(self):
+        raise NotImplementedError
+    
+    def cancel(self):
+        raise NotImplementedError
+    
+    def result(self):
+        """Solver result dict, raises RuntimeError if the solver failed"""
+        kind, payload = self.outcome
+        if kind == 'error':
+            raise RuntimeError(payload)
+        return payload
+
+class ProcessSolve(BackgroundSolve):
+    """Solver in a child process, the GIL and the UI stay free and cancel() kills it outright.
+    
+    algorithm must be picklable: a module-level solver or a functools.partial of one.
+    """
+    
+    def __init__(self, algorithm, puzzle, goal_puzzle, time_limit_ms=None, node_limit=None):
+        super().__init__()
+        self.connection, child_connection = _context.Pipe(duplex=False)
+        self.process = _context.Process(target=solve_worker, daemon=True,
+                                        args=(algorithm, puzzle.to_bytes(), goal_puzzle.to_bytes(),
+                                              time_limit_ms, node_limit, child_connection))
+        self.process.start()
+        # Only the child holds the write end now, so a dead child reads as EOF
+        child_connection.close()
+    
+    def poll(self):
+        while self.outcome is None and (self.connection.poll() or not self.process.is_alive()):
+            try:
+                kind, payload = self.connection.recv()
+            except EOFError:
+                kind, payload = 'error', f"Solver process exited with code {self.process.exitcode}"
+            if kind == 'progress':
+                self.progress = payload
+                continue
+            self.outcome = (kind, decode_result(payload) if kind == 'result' else payload)
+            self.connection.close()
+            self.process.join()
+        return self.outcome is not None
+    
+    def cancel(self):
+        """Hard kill, a killed search has no partial result to report"""
+        if self.outcome is not None:
+            return
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+        self.outcome = ('result', search_result(self.start_time, None, [], 0, 0, 'cancelled', None, [], None))
+
+class ThreadSolve(BackgroundSolve):
+    """Solver on a daemon thread, the fallback where child processes are unavailable.
+    
+    cancel() asks the search to stop, it then reports its closest state as usual.
+    """
+    
+    def __init__(self, algorithm, puzzle, goal_puzzle, time_limit_ms=None, node_limit=None):
+        super().__init__()
+        self.control = SearchControl(time_limit_ms=time_limit_ms, node_limit=node_limit,
+                                     progress=self.set_progress)
+        self.thread = threading.Thread(target=self.run, args=(algorithm, puzzle, goal_puzzle), daemon=True)
+        self.thread.start()
+    
+    def run(self, algorithm, puzzle, goal_puzzle):
+        try:
+            self.outcome = ('result', algorithm(puzzle, goal_puzzle, control=self.control))
+        except Exception as e:
+            self.outcome = ('error', str(e))
+    
+    def set_progress(self, progress):
+        self.progress = progress
+    
+    def poll(self):
+        return not self.thread.is_alive()
+    
+    def cancel(self):
+        self.control.cancel()
+
+def start_solve(algorithm, puzzle, goal_puzzle, use_process=True, time_limit_ms=None, node_limit=None):
+    """Start a background solve, in a child process when possible, otherwise on a thread"""
+    if use_process:
+        try:
+            return ProcessSolve(algorithm, puzzle, goal_puzzle, time_limit_ms, node_limit)
+        except (OSError, TypeError, pickle.PicklingError):
+            pass
+    return ThreadSolve(algorithm, puzzle, goal_puzzle, time_limit_ms, node_limit)
+
+# Portfolio engines in launch priority order:
+# (name, picklable solver, returns optimal solutions, largest board in cells or None)
+PORTFOLIO_ENGINES = [
+    ("IDA* + Linear Conflict", partial(solve_puzzle_idastar, heuristic="Linear Conflict"), True, None),
+    ("A* + Linear Conflict", partial(solve_puzzle_astar, heuristic="Linear Conflict"), True, None),
+    ("GBFS + Linear Conflict", partial(solve_puzzle_gbfs, heuristic="Linear Conflict"), False, None),
+    ("IDA* + Walking Distance", partial(solve_puzzle_idastar, heuristic="Walking Distance"), True,
+     WalkingDistanceHeuristic.MAX_TILES),
+    ("GBFS + Manhattan", partial(solve_puzzle_gbfs, heuristic="Manhattan"), False, None),
+    ("Bidirectional BFS", solve_puzzle_bidirectional_bfs, True, None),
+    ("A* + Manhattan", partial(solve_puzzle_astar, heuristic="Manhattan"), True, None)
+]
+
+def portfolio_candidates(puzzle, quality="any", engines=None, max_engines=None):
+    """Engines the portfolio launches for this board, in priority order.
+    
+    Engines that cannot run on the board are left out. With quality "any" a
+    non-optimal engine always gets a slot, on a few cores the optimal ones
+    alone can run out of time on a large board.
+    """
+    cells = puzzle.rows * puzzle.cols
+    candidates = [engine for engine in (engines or PORTFOLIO_ENGINES)
+                  if (quality == "any" or engine[2]) and (engine[3] is None or cells <= engine[3])]
+    # At least two engines, a race on one core still beats a wrong guess
+    slots = max_engines or max(os.cpu_count() or 1, 2)
+    chosen = candidates[:slots]
+    greedy = [engine for engine in candidates if not engine[2]]
+    if greedy and all(engine[2] for engine in chosen):
+        chosen[-1] = greedy[0]
+    return chosen
+
+def solve_puzzle_portfolio(puzzle, goal_puzzle, quality="any", control=None, engines=None, max_engines=None):
+    """Portfolio - races several solvers in child processes and keeps the first acceptable answer.
+    
+    quality "optimal" only launches engines with optimal solutions, "any" takes
+    whichever engine solves first. The losers are killed, the result names the
+    winner under 'engine'. Each child is itself a process, so run this one on a
+    thread (ThreadSolve), not inside ProcessSolve. Raises RuntimeError if every
+    engine failed.
+    """
+    if quality not in ("any", "optimal"):
+        raise ValueError(f"Unknown portfolio quality: {quality}")
+    start_time = time.time()
+    control = control or SearchControl()
+    control.start()
+    
+    candidates = portfolio_candidates(puzzle, quality, engines, max_engines)
+    if not candidates:
+        raise ValueError(f"No portfolio engine supports a {puzzle.rows}x{puzzle.cols} board")
+    solves = {name: ProcessSolve(algorithm, puzzle, goal_puzzle, control.time_limit_ms, control.node_limit)
+              for name, algorithm, _, _ in candidates}
+    finished = []
+    errors = []
+    winner = None
+    stop_reason = None
+    
+    try:
+        while solves and winner is None and stop_reason is None:
+            wait([solve.connection for solve in solves.values()]
+                 + [solve.process.sentinel for solve in solves.values()], timeout=0.05)
+            for name in list(solves):
+                if not solves[name].poll():
+                    continue
+                solve = solves.pop(name)
+                if solve.outcome[0] != 'result':
+                    errors.append(f"{name}: {solve.outcome[1]}")
+                    continue
+                if solve.result()['status'] == 'solved':
+                    winner = (name, solve.result())
+                    break
+                finished.append(solve.result())
+            
+            # Engines enforce the budgets themselves and come back with partial results
+            if control.cancel_event.is_set():
+                stop_reason = 'cancelled'
+            if control.progress_due():
+                snapshots = [solve.progress for solve in solves.values() if solve.progress]
+                if snapshots:
+                    control.report(sum(snapshot['nodes_expanded'] for snapshot in snapshots),
+                                   sum(snapshot['frontier'] for snapshot in snapshots),
+                                   max(snapshot['bound'] for snapshot in snapshots),
+                                   sum(snapshot['memory_bytes'] for snapshot in snapshots))
+    finally:
+        for solve in solves.values():
+            solve.cancel()
+    
+    if winner is not None:
+        result = dict(winner[1])
+        result['engine'] = winner[0]
+        result['runtime_ms'] = (time.time() - start_time) * 1000
+        return result
+    
+    # An 'unsolvable' verdict needs at least one engine that finished its search
+    if not finished and stop_reason is None:
+        raise RuntimeError("Every portfolio engine failed:\n" + "\n".join(errors))
+    
+    # Nothing solved, report the closest state any stopped engine reached
+    partials = [result for result in finished if result.get('partial_h') is not None]
+    closest = min(partials, key=lambda result: result['partial_h']) if partials else {}
+    if stop_reason is None and partials:
+        stop_reason = closest['status']
+    return search_result(start_time, None, [], sum(result['max_puzzles_in_memory'] for result in finished),
+                         sum(result['nodes_expanded'] for result in finished), stop_reason,
+                         closest.get('partial_puzzle'), closest.get('partial_moves', []), closest.get('partial_h'))
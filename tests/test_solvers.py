@@ -0,0 +1,117 @@
+import os
+import sys
+
+import pytest
+
+# Add the repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from puzzle import Puzzle
+from heuristics import HEURISTICS
+from search_algorithms import (
+    DIRECTION_NAMES,
+    SearchControl,
+    slide_puzzle,
+    solve_puzzle_bfs,
+    solve_puzzle_bidirectional_bfs,
+    solve_puzzle_astar,
+    solve_puzzle_weighted_astar,
+    solve_puzzle_arastar,
+    solve_puzzle_idastar
+)
+from pattern_database import PatternDatabaseHeuristic
+from solve_process import portfolio_candidates
+
+DIRECTIONS = {name: direction for direction, name in DIRECTION_NAMES.items()}
+
+# Seeded uniform 3x3 shuffles, 236 and 542 once came back suboptimal from A* + Pattern Database
+BOARD_SEEDS = [0, 1, 2, 3, 4, 5, 6, 7, 236, 542]
+
+# A* + Pattern Database once returned 20 moves here, 18 is optimal
+PDB_REGRESSION_BOARD = [[5, 3, 0], [7, 2, 6], [4, 1, 8]]
+
+GOAL = Puzzle(3, 3, gen_random=False)
+
+def board(seed):
+    return Puzzle(3, 3, seed=seed) if isinstance(seed, int) else Puzzle.from_matrix(seed)
+
+_optimal_lengths = {}
+
+def optimal_length(start):
+    """BFS solution length, shared between tests"""
+    key = start.to_key()
+    if key not in _optimal_lengths:
+        _optimal_lengths[key] = len(solve_puzzle_bfs(start, GOAL)['solution_moves'])
+    return _optimal_lengths[key]
+
+def assert_reaches_goal(start, moves):
+    puzzle = Puzzle.from_puzzle(start)
+    for move in moves:
+        slide_puzzle(puzzle, DIRECTIONS[move])
+    assert puzzle.is_equal_to_puzzle(GOAL)
+
+@pytest.mark.parametrize("heuristic", list(HEURISTICS))
+@pytest.mark.parametrize("seed", BOARD_SEEDS + [PDB_REGRESSION_BOARD])
+def test_astar_is_optimal(seed, heuristic):
+    start = board(seed)
+    result = solve_puzzle_astar(start, GOAL, heuristic)
+    assert result['status'] == 'solved'
+    assert len(result['solution_moves']) == optimal_length(start)
+    assert_reaches_goal(start, result['solution_moves'])
+
+@pytest.mark.parametrize("heuristic", list(HEURISTICS))
+@pytest.mark.parametrize("seed", BOARD_SEEDS[:4] + [PDB_REGRESSION_BOARD])
+def test_idastar_is_optimal(seed, heuristic):
+    start = board(seed)
+    result = solve_puzzle_idastar(start, GOAL, heuristic)
+    assert len(result['solution_moves']) == optimal_length(start)
+    assert_reaches_goal(start, result['solution_moves'])
+
+@pytest.mark.parametrize("seed", BOARD_SEEDS[:4])
+def test_bidirectional_bfs_is_optimal(seed):
+    start = board(seed)
+    result = solve_puzzle_bidirectional_bfs(start, GOAL)
+    assert len(result['solution_moves']) == optimal_length(start)
+    assert_reaches_goal(start, result['solution_moves'])
+
+@pytest.mark.parametrize("heuristic", list(HEURISTICS))
+@pytest.mark.parametrize("seed", BOARD_SEEDS[:4] + [PDB_REGRESSION_BOARD])
+def test_weighted_searches_keep_their_bound(seed, heuristic):
+    start = board(seed)
+    weighted = solve_puzzle_weighted_astar(start, GOAL, heuristic, weight=2.0)
+    assert len(weighted['solution_moves']) <= weighted['bound'] * optimal_length(start)
+    assert_reaches_goal(start, weighted['solution_moves'])
+    
+    # Run to completion, ARA* ends with a proven optimum
+    anytime = solve_puzzle_arastar(start, GOAL, heuristic)
+    assert anytime['bound'] == 1
+    assert len(anytime['solution_moves']) == optimal_length(start)
+
+def test_node_limit_returns_partial_result():
+    start = board(BOARD_SEEDS[0])
+    result = solve_puzzle_bfs(start, GOAL, SearchControl(node_limit=1000))
+    assert result['status'] == 'node_limit'
+    assert result['partial_h'] is not None
+    puzzle = Puzzle.from_puzzle(start)
+    for move in result['partial_moves']:
+        slide_puzzle(puzzle, DIRECTIONS[move])
+    assert puzzle.is_equal_to_puzzle(result['partial_puzzle'])
+
+@pytest.mark.parametrize("rows, cols", [(3, 3), (3, 4), (4, 3), (4, 4), (2, 5)])
+def test_default_goal_is_solvable(rows, cols):
+    goal = Puzzle(rows, cols, gen_random=False).matrix
+    assert Puzzle.is_puzzle_solvable_2d(goal)
+    assert Puzzle.is_solvable_between_2d(Puzzle.generate_random_puzzle(rows, cols, True, seed=1), goal)
+
+@pytest.mark.parametrize("max_engines", [1, 2, 3])
+def test_portfolio_keeps_a_greedy_engine_and_skips_unsupported_ones(max_engines):
+    names = [engine[0] for engine in portfolio_candidates(Puzzle(5, 5, seed=3), "any", max_engines=max_engines)]
+    assert len(names) == max_engines
+    assert any(name.startswith("GBFS") for name in names)
+    optimal = [engine[0] for engine in portfolio_candidates(Puzzle(5, 5, seed=3), "optimal", max_engines=7)]
+    assert "IDA* + Walking Distance" not in optimal
+
+def test_pattern_database_is_not_built_past_4x4(tmp_path):
+    with pytest.raises(ValueError, match="python pattern_database.py 5 5"):
+        PatternDatabaseHeuristic(Puzzle(5, 5, gen_random=False), directory=str(tmp_path))
+    assert not os.listdir(tmp_path)